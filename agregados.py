@@ -0,0 +1,175 @@
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Dimensiones del agregado, en el orden de la clave
+DIMENSIONES = ["area", "agrupacion", "estado", "responsable", "mes"]
+
+class AgregadosObjetivos:
+    """Conteos de objetivos por área × agrupación × estado × responsable × mes.
+
+    Se mantiene de forma incremental y solo a través de `sincronizar`: las filas
+    nuevas y las filas modificadas solo cambian los contadores afectados, sin
+    volver a recorrer la hoja.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conteos = Counter()
+        self._por_area = Counter()
+        self._por_responsable = Counter()
+        self._por_estado = Counter()
+        self._por_mes = Counter()
+        self._total = 0
+        # Clave completa (DIMENSIONES) de cada fila sincronizada, en el orden de la hoja
+        self._claves_filas = np.empty((0, len(DIMENSIONES)), dtype=object)
+        # Versión de los datos de origen de la última sincronización
+        self._version = None
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Construye los agregados a partir de un DataFrame de objetivos"""
+        agregados = cls()
+        agregados.sincronizar(df)
+        return agregados
+
+    # --- Actualización -------------------------------------------------
+
+    def _sumar(self, area, agrupacion, estado, responsable, mes, n):
+        self._conteos[(area, agrupacion, estado, responsable, mes)] += n
+        self._por_area[area] += n
+        self._por_responsable[responsable] += n
+        self._por_estado[estado] += n
+        self._por_mes[mes] += n
+        self._total += n
+        # Eliminar claves a cero para que los recuentos de únicos sean exactos
+        for contador, clave in (
+            (self._conteos, (area, agrupacion, estado, responsable, mes)),
+            (self._por_area, area),
+            (self._por_responsable, responsable),
+            (self._por_estado, estado),
+            (self._por_mes, mes),
+        ):
+            if contador[clave] <= 0:
+                del contador[clave]
+
+    def _sumar_filas(self, claves, signo):
+        """Suma (o resta, con signo -1) las filas de un array de claves, agrupadas"""
+        if len(claves) == 0:
+            return
+        tabla = pd.DataFrame(claves, columns=DIMENSIONES)
+        for clave, n in tabla.groupby(DIMENSIONES, sort=False).size().items():
+            self._sumar(*clave, signo * int(n))
+
+    def sincronizar(self, df, version=None):
+        """Incorpora al agregado los cambios del DataFrame respecto a la última sincronización.
+
+        El DataFrame debe venir en el orden de la hoja. Se compara la clave
+        completa de cada fila ya conocida con la de su misma posición: las filas
+        que cambian (de estado, de área... o de sitio al reordenar la hoja) restan
+        su clave anterior y suman la nueva, y las filas añadidas se suman.
+        Si la hoja tiene menos filas que antes (borrados), se reconstruye.
+        Si se indica `version` y coincide con la última sincronizada, no se hace nada.
+        """
+        if version is not None and version == self._version:
+            return
+        if df.empty or not all(col in df.columns for col in ["area", "estado", "responsable"]):
+            return
+
+        vacia = pd.Series("", index=df.index)
+        if "fecha" in df.columns:
+            # Fecha ya convertida por indexar_fechas (admite números de serie de Sheets)
+            mes = df["fecha"].dt.strftime("%Y-%m").fillna("")
+        elif "timestamp" in df.columns:
+            mes = df["timestamp"].astype(str).str.strip().str[:7]
+        else:
+            mes = vacia
+        columnas = {
+            "area": df["area"],
+            "agrupacion": df["agrupacion"] if "agrupacion" in df.columns else vacia,
+            "estado": df["estado"],
+            "responsable": df["responsable"],
+            "mes": mes,
+        }
+        claves = np.column_stack([
+            columnas[dimension].astype(str).to_numpy(dtype=object) for dimension in DIMENSIONES
+        ])
+
+        with self._lock:
+            if len(claves) < len(self._claves_filas):
+                self._reiniciar()
+
+            n_previas = len(self._claves_filas)
+
+            # Filas ya conocidas cuya clave ha cambiado en alguna dimensión
+            if n_previas:
+                cambiadas = (claves[:n_previas] != self._claves_filas).any(axis=1)
+                if cambiadas.any():
+                    self._sumar_filas(self._claves_filas[cambiadas], -1)
+                    self._sumar_filas(claves[:n_previas][cambiadas], 1)
+
+            # Filas nuevas
+            self._sumar_filas(claves[n_previas:], 1)
+
+            self._claves_filas = claves
+            self._version = version
+
+    def _reiniciar(self):
+        self._conteos.clear()
+        self._por_area.clear()
+        self._por_responsable.clear()
+        self._por_estado.clear()
+        self._por_mes.clear()
+        self._total = 0
+        self._claves_filas = np.empty((0, len(DIMENSIONES)), dtype=object)
+        self._version = None
+
+    # --- Consultas -----------------------------------------------------
+
+    @property
+    def version(self):
+        """Versión de los datos de origen de la última sincronización (None si no se indicó)"""
+        return self._version
+
+    @property
+    def total(self):
+        return self._total
+
+    @property
+    def n_areas(self):
+        return len(self._por_area)
+
+    @property
+    def n_responsables(self):
+        return len(self._por_responsable)
+
+    def contar_estado(self, estado):
+        return self._por_estado.get(estado, 0)
+
+    def por_area(self):
+        """Serie con el número de objetivos por área"""
+        with self._lock:
+            return pd.Series(dict(self._por_area), dtype="int64").sort_index()
+
+    def por_mes(self):
+        """Serie con el número de objetivos por mes (AAAA-MM)"""
+        with self._lock:
+            serie = pd.Series(dict(self._por_mes), dtype="int64")
+        return serie[serie.index != ""].sort_index()
+
+    def por_area_y_estado(self):
+        """Tabla área × estado con el número de objetivos"""
+        with self._lock:
+            filas = [(clave[0], clave[2], n) for clave, n in self._conteos.items()]
+        if not filas:
+            return pd.DataFrame()
+        tabla = pd.DataFrame(filas, columns=["area", "estado", "n"])
+        return tabla.pivot_table(index="area", columns="estado", values="n", aggfunc="sum", fill_value=0)
+
+    def como_dataframe(self):
+        """Devuelve los conteos como DataFrame con una fila por combinación"""
+        with self._lock:
+            filas = [(*clave, n) for clave, n in self._conteos.items()]
+        return pd.DataFrame(filas, columns=DIMENSIONES + ["n"])
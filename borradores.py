@@ -0,0 +1,133 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import astuple, dataclass
+
+logger = logging.getLogger("formulario_objetivos.borradores")
+
+@dataclass(slots=True)
+class ObjetivoBorrador:
+    """Un objetivo del formulario en curso"""
+    objetivo: str = ""
+    indicador: str = ""
+    responsable: str = ""
+
+    def vacio(self):
+        return not (self.objetivo.strip() or self.indicador.strip() or self.responsable.strip())
+
+def borrador_a_json(borrador):
+    """Serializa un borrador como lista de [objetivo, indicador, responsable]"""
+    return json.dumps([astuple(registro) for registro in borrador], ensure_ascii=False, separators=(",", ":"))
+
+def borrador_desde_json(texto):
+    """Reconstruye un borrador serializado con borrador_a_json"""
+    return [ObjetivoBorrador(*map(str, registro)) for registro in json.loads(texto)]
+
+class AlmacenBorradores:
+    """Almacén local (SQLite) de borradores con guardado diferido en segundo plano.
+
+    Las sesiones solo dejan su último borrador en memoria con `programar`; un
+    hilo vuelca los pendientes a disco como mucho cada `intervalo` segundos,
+    en una única transacción para todos los usuarios. Al volcar se olvidan las
+    sesiones inactivas durante `inactividad` segundos y se borran de disco los
+    borradores sin cambios en `dias_retencion` días.
+    """
+
+    def __init__(self, ruta, intervalo=3.0, inactividad=3600.0, dias_retencion=30):
+        self._ruta = ruta
+        self._intervalo = intervalo
+        self._inactividad = inactividad
+        self._retencion = dias_retencion * 86400
+        self._lock = threading.Lock()
+        # id_borrador -> JSON pendiente de escribir (None = eliminar)
+        self._pendientes = {}
+        # id_borrador -> (último JSON programado, momento), para no reescribir lo mismo
+        self._ultimos = {}
+        self._hilo = None
+
+        with self._conectar() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS borradores ("
+                "id TEXT PRIMARY KEY, datos TEXT NOT NULL, actualizado REAL NOT NULL)"
+            )
+            conexion.execute(
+                "CREATE INDEX IF NOT EXISTS borradores_actualizado ON borradores (actualizado)"
+            )
+
+    def _conectar(self):
+        return sqlite3.connect(self._ruta, timeout=10)
+
+    def _iniciar_hilo(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="autoguardado-borradores", daemon=True)
+            self._hilo.start()
+
+    def programar(self, id_borrador, borrador):
+        """Programa el guardado de un borrador; un borrador sin contenido se elimina"""
+        if all(registro.vacio() for registro in borrador):
+            self.eliminar(id_borrador)
+            return
+        self._programar(id_borrador, borrador_a_json(borrador))
+
+    def eliminar(self, id_borrador):
+        """Programa la eliminación de un borrador (p. ej. tras enviarlo)"""
+        self._programar(id_borrador, None)
+
+    def _programar(self, id_borrador, datos):
+        with self._lock:
+            anterior = self._ultimos.get(id_borrador)
+            self._ultimos[id_borrador] = (datos, time.time())
+            if anterior is not None and anterior[0] == datos:
+                return
+            self._pendientes[id_borrador] = datos
+            self._iniciar_hilo()
+
+    def cargar(self, id_borrador):
+        """Devuelve el borrador guardado (o pendiente de guardar), o None si no existe"""
+        with self._lock:
+            if id_borrador in self._pendientes:
+                datos = self._pendientes[id_borrador]
+                return borrador_desde_json(datos) if datos is not None else None
+
+        with self._conectar() as conexion:
+            fila = conexion.execute("SELECT datos FROM borradores WHERE id = ?", (id_borrador,)).fetchone()
+        return borrador_desde_json(fila[0]) if fila else None
+
+    def volcar(self):
+        """Escribe en disco todos los borradores pendientes"""
+        ahora = time.time()
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+            # Olvidar las sesiones inactivas: si vuelven, su próximo borrador se escribe de nuevo
+            for id_borrador in [
+                id_borrador for id_borrador, (_, momento) in self._ultimos.items()
+                if ahora - momento > self._inactividad
+            ]:
+                del self._ultimos[id_borrador]
+        if not pendientes:
+            return
+
+        guardar = [(id_borrador, datos, ahora) for id_borrador, datos in pendientes.items() if datos is not None]
+        eliminar = [(id_borrador,) for id_borrador, datos in pendientes.items() if datos is None]
+        try:
+            with self._conectar() as conexion:
+                conexion.executemany(
+                    "INSERT INTO borradores (id, datos, actualizado) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET datos = excluded.datos, actualizado = excluded.actualizado",
+                    guardar
+                )
+                conexion.executemany("DELETE FROM borradores WHERE id = ?", eliminar)
+                conexion.execute("DELETE FROM borradores WHERE actualizado < ?", (ahora - self._retencion,))
+        except sqlite3.Error as e:
+            logger.error("Error guardando borradores: %s", e)
+            # Volver a dejar pendientes los que no se hayan reemplazado entretanto
+            with self._lock:
+                for id_borrador, datos in pendientes.items():
+                    self._pendientes.setdefault(id_borrador, datos)
+
+    def _bucle(self):
+        while True:
+            time.sleep(self._intervalo)
+            self.volcar()
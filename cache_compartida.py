@@ -0,0 +1,151 @@
+"""Caché columnar compartida entre procesos (Arrow IPC en disco).
+
+Varias réplicas de la aplicación en la misma máquina comparten un fichero
+Arrow IPC con los objetivos. Un fichero de versión (JSON) indica cuál es el
+vigente: un solo proceso (el que obtiene el cerrojo) lo refresca cuando
+caduca y los demás lo abren con memory-map, sin copiar las columnas de texto.
+"""
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin cerrojo entre procesos
+    fcntl = None
+
+logger = logging.getLogger("formulario_objetivos.cache")
+
+def _tipos_pandas(tipo):
+    """Las columnas de texto se mantienen en Arrow (sin copia); el resto se convierte a NumPy"""
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return pd.ArrowDtype(tipo)
+    return None
+
+class CacheColumnar:
+    """Caché de un DataFrame en un fichero Arrow IPC compartido por varios procesos"""
+
+    def __init__(self, nombre, directorio=None, ttl=60.0):
+        self._directorio = directorio or os.path.join(tempfile.gettempdir(), "formulario_objetivos_cache")
+        os.makedirs(self._directorio, exist_ok=True)
+        self._nombre = nombre
+        self._ttl = ttl
+        self._ruta_version = os.path.join(self._directorio, f"{nombre}.version.json")
+        self._ruta_cerrojo = os.path.join(self._directorio, f"{nombre}.lock")
+        self._lock = threading.Lock()
+        # Última versión abierta en este proceso y su DataFrame
+        self._abierta = (None, None)
+
+    def _ruta_datos(self, version):
+        return os.path.join(self._directorio, f"{self._nombre}-{version}.arrow")
+
+    def leer_version(self):
+        """Devuelve la información del fichero de versión, o None si no existe"""
+        try:
+            with open(self._ruta_version, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _vigente(self, info):
+        return info is not None and not info.get("invalidada") and time.time() - info["creado"] < self._ttl
+
+    def _escribir_json(self, ruta, datos):
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f)
+        os.replace(temporal, ruta)
+
+    def invalidar(self):
+        """Marca la versión actual como caducada; la siguiente lectura la refresca"""
+        info = self.leer_version()
+        if info is not None and not info.get("invalidada"):
+            self._escribir_json(self._ruta_version, {**info, "invalidada": True})
+
+    def _escribir(self, df):
+        """Escribe el DataFrame como nueva versión y devuelve su información"""
+        version = time.time_ns()
+        ruta = self._ruta_datos(version)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(temporal, "wb") as destino:
+            with pa.ipc.new_file(destino, tabla.schema) as escritor:
+                escritor.write_table(tabla)
+        os.replace(temporal, ruta)
+
+        info = {"version": version, "creado": time.time(), "filas": len(df)}
+        self._escribir_json(self._ruta_version, info)
+
+        # Borrar versiones antiguas; los procesos que aún las tengan mapeadas
+        # siguen pudiendo leerlas hasta cerrarlas
+        for antigua in glob.glob(os.path.join(self._directorio, f"{self._nombre}-*.arrow")):
+            if antigua != ruta:
+                try:
+                    os.remove(antigua)
+                except OSError:
+                    pass
+        return info
+
+    def _abrir(self, info):
+        """Abre una versión con memory-map (una sola vez por proceso y versión)"""
+        with self._lock:
+            version, df = self._abierta
+            if version == info["version"]:
+                return df
+
+        fuente = pa.memory_map(self._ruta_datos(info["version"]), "r")
+        tabla = pa.ipc.open_file(fuente).read_all()
+        df = tabla.to_pandas(types_mapper=_tipos_pandas)
+        with self._lock:
+            self._abierta = (info["version"], df)
+        return df
+
+    def obtener(self, cargar):
+        """Devuelve (DataFrame, versión). Si la versión compartida ha caducado,
+        un único proceso la refresca con `cargar()` mientras los demás siguen
+        usando la anterior (o esperan si todavía no hay ninguna).
+        """
+        info = self.leer_version()
+        if self._vigente(info):
+            try:
+                return self._abrir(info), info["version"]
+            except OSError:
+                # La versión se ha reemplazado mientras se abría: refrescar
+                info = self.leer_version()
+
+        with open(self._ruta_cerrojo, "a") as cerrojo:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(cerrojo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Otro proceso está refrescando
+                    if info is not None:
+                        try:
+                            return self._abrir(info), info["version"]
+                        except OSError:
+                            pass
+                    fcntl.flock(cerrojo, fcntl.LOCK_EX)
+            try:
+                # Puede que otro proceso haya terminado de refrescar mientras tanto
+                info = self.leer_version()
+                if self._vigente(info):
+                    return self._abrir(info), info["version"]
+
+                inicio = time.perf_counter()
+                info = self._escribir(cargar())
+                logger.info(
+                    "Caché '%s' refrescada: %d filas en %.2f s",
+                    self._nombre, info["filas"], time.perf_counter() - inicio
+                )
+                return self._abrir(info), info["version"]
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(cerrojo, fcntl.LOCK_UN)
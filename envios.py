@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+COLUMNAS_ENVIOS = ["token", "huella", "id_entrada", "timestamp"]
+
+# Segundos durante los que un envío con el mismo contenido se considera repetido
+# (doble clic, reintento de red). Pasado ese tiempo se acepta como envío nuevo:
+# el mismo objetivo puede volver a crearse legítimamente en otro ciclo
+VENTANA_DUPLICADOS = 10 * 60
+
+def _momento(timestamp):
+    """Convierte el timestamp de una fila de envíos en segundos desde epoch (0 si no es válido)"""
+    try:
+        return datetime.strptime(str(timestamp).strip(), "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return 0.0
+
+def _normalizar(texto):
+    return " ".join(str(texto).split()).lower()
+
+def huella_envio(area, agrupacion, objetivos):
+    """Calcula la huella del contenido de un envío.
+
+    Los objetivos son tuplas (objetivo, indicador, responsable); se normalizan
+    (espacios y mayúsculas) y se ordenan para que el orden no cambie la huella.
+    """
+    contenido = [
+        _normalizar(area),
+        _normalizar(agrupacion),
+        sorted([_normalizar(campo) for campo in objetivo] for objetivo in objetivos),
+    ]
+    return hashlib.sha256(json.dumps(contenido, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class RegistroEnvios:
+    """Tokens y huellas de los envíos recientes, en memoria.
+
+    `reservar` comprueba y reserva en una sola operación bajo cerrojo, de modo
+    que dos envíos simultáneos con el mismo token o contenido no pasan ambos.
+    Solo cuentan los envíos de los últimos `ventana` segundos; los anteriores
+    se olvidan.
+    """
+
+    def __init__(self, ventana=VENTANA_DUPLICADOS):
+        self._lock = threading.Lock()
+        self._ventana = ventana
+        # token / huella -> momento del envío, en orden de llegada (aprox. cronológico)
+        self._tokens = {}
+        self._huellas = {}
+        # Filas de la hoja de envíos ya incorporadas
+        self.filas_leidas = 0
+
+    @staticmethod
+    def _anotar(registro, clave, momento):
+        # Reinsertar para que el dict siga en orden de llegada
+        registro.pop(clave, None)
+        registro[clave] = momento
+
+    def _olvidar_antiguos(self, ahora):
+        for registro in (self._tokens, self._huellas):
+            while registro:
+                clave, momento = next(iter(registro.items()))
+                if ahora - momento < self._ventana:
+                    break
+                del registro[clave]
+
+    def _reciente(self, registro, clave, ahora):
+        momento = registro.get(clave)
+        return momento is not None and ahora - momento < self._ventana
+
+    def incorporar(self, filas, desde):
+        """Añade envíos persistidos (filas [token, huella, id_entrada, timestamp]) leídos a partir de la fila `desde`.
+
+        Si otra sesión ya incorporó parte de esas filas, solo se añaden las restantes.
+        """
+        with self._lock:
+            for fila in filas[max(self.filas_leidas - desde, 0):]:
+                self.filas_leidas += 1
+                momento = _momento(fila[3]) if len(fila) > 3 else 0.0
+                if len(fila) > 0 and fila[0]:
+                    self._anotar(self._tokens, fila[0], momento)
+                if len(fila) > 1 and fila[1]:
+                    self._anotar(self._huellas, fila[1], momento)
+            self._olvidar_antiguos(time.time())
+
+    def reservar(self, token, huella, ahora=None):
+        """Reserva un envío; devuelve False si el token o el contenido se enviaron hace menos de `ventana` segundos"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            self._olvidar_antiguos(ahora)
+            if self._reciente(self._tokens, token, ahora) or self._reciente(self._huellas, huella, ahora):
+                return False
+            self._anotar(self._tokens, token, ahora)
+            self._anotar(self._huellas, huella, ahora)
+            return True
+
+    def confirmar(self, huella_reservada, huella_confirmada):
+        """Sustituye la huella reservada por la del contenido que realmente se guardó"""
+        with self._lock:
+            momento = self._huellas.pop(huella_reservada, time.time())
+            self._anotar(self._huellas, huella_confirmada, momento)
+
+    def liberar(self, token, huella):
+        """Anula una reserva cuyo envío no llegó a guardarse"""
+        with self._lock:
+            self._tokens.pop(token, None)
+            self._huellas.pop(huella, None)
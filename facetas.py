@@ -0,0 +1,35 @@
+import pandas as pd
+
+# Columnas por las que se puede filtrar en "Ver Objetivos"
+FACETAS = ["area", "estado", "responsable"]
+
+def conteos_grupos(df, facetas=FACETAS):
+    """Cuenta los objetivos de cada combinación de valores de las facetas"""
+    presentes = [faceta for faceta in facetas if faceta in df.columns]
+    if df.empty or not presentes:
+        return pd.DataFrame(columns=presentes + ["n"])
+    return df.groupby(presentes, sort=False).size().reset_index(name="n")
+
+def conteos_desde_agregados(agregados, facetas=FACETAS):
+    """Obtiene los conteos por combinación de facetas de los agregados incrementales"""
+    tabla = agregados.como_dataframe()
+    if tabla.empty:
+        return pd.DataFrame(columns=list(facetas) + ["n"])
+    return tabla.groupby(list(facetas), sort=False)["n"].sum().reset_index()
+
+def contar_facetas(conteos, seleccion):
+    """Devuelve, para cada faceta, el número de objetivos por valor según las demás selecciones.
+
+    `seleccion` asocia cada faceta a su valor elegido (o None si no se filtra).
+    Solo se recorre la tabla de conteos por combinación, no las filas.
+    """
+    resultado = {}
+    for faceta in seleccion:
+        if faceta not in conteos.columns:
+            continue
+        mascara = pd.Series(True, index=conteos.index)
+        for otra, valor in seleccion.items():
+            if otra != faceta and valor is not None and otra in conteos.columns:
+                mascara &= conteos[otra] == valor
+        resultado[faceta] = conteos.loc[mascara].groupby(faceta)["n"].sum()
+    return resultado
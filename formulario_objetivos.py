@@ -1,10 +1,23 @@
+import rendimiento
+_inicio_ejecucion = rendimiento.marcar_inicio()
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 import io
+import os
 import uuid
 import time
-from gsheets_service import cargar_areas_agrupaciones, guardar_objetivo, guardar_nueva_agrupacion
+from dataclasses import astuple
+from gsheets_service import (
+    cargar_areas_agrupaciones, confirmar_envio, guardar_nueva_agrupacion, guardar_objetivo,
+    liberar_envio, reservar_envio
+)
+from agregados import AgregadosObjetivos
+from borradores import AlmacenBorradores, ObjetivoBorrador
+from facetas import contar_facetas, conteos_desde_agregados, conteos_grupos
+from periodos import PERIODOS, filtrar_por_fechas, indexar_fechas, rango_periodo
+from ui_components import render_desglose_agregados, render_objective_cards
 
 # Configuración de la página
 st.set_page_config(
@@ -14,8 +27,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS personalizado para mejorar la interfaz
-st.markdown("""
+# CSS personalizado para mejorar la interfaz (Streamlit reconstruye la página
+# en cada ejecución, así que debe enviarse siempre)
+ESTILOS_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #1f4e79 0%, #2e7bcf 100%);
@@ -42,6 +56,40 @@ st.markdown("""
         margin-bottom: 1rem;
     }
     
+    .obj-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 8px;
+        border-left: 4px solid #6c757d;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        margin-bottom: 1rem;
+    }
+    
+    .obj-card-activo { border-left-color: #28a745; }
+    .obj-card-activo .obj-card-estado { color: #28a745; }
+    .obj-card-inactivo .obj-card-estado { color: #6c757d; }
+    
+    .obj-card-header {
+        display: flex;
+        justify-content: space-between;
+        align-items: start;
+        margin-bottom: 1rem;
+    }
+    
+    .obj-card-title { margin: 0; color: #1f4e79; }
+    .obj-card-estado { font-weight: bold; }
+    
+    .obj-card-grid {
+        display: grid;
+        grid-template-columns: 1fr 1fr;
+        gap: 1rem;
+        margin-bottom: 1rem;
+    }
+    
+    .obj-card-small { font-size: 0.9rem; color: #6c757d; margin-bottom: 0; }
+    .obj-card-muted { color: #6c757d; }
+    .obj-card-meta { margin-top: 1rem; font-size: 0.8rem; color: #adb5bd; }
+    
     .data-table {
         background: white;
         border-radius: 8px;
@@ -49,16 +97,36 @@ st.markdown("""
         box-shadow: 0 2px 4px rgba(0,0,0,0.1);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-def render_header():
-    """Renderiza el header principal de la aplicación"""
-    # Intentar mostrar el logo
+st.markdown(ESTILOS_CSS, unsafe_allow_html=True)
+
+RUTA_LOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo_ayuntamiento_azul.png")
+
+@st.cache_resource
+def cargar_logo(ancho=300):
+    """Carga el logo una vez por proceso, redimensionado, como bytes PNG.
+    
+    Se muestra con st.image, que lo sirve por una URL de medios que el
+    navegador guarda en caché (un data URI se reenviaría en cada ejecución).
+    """
     try:
-        st.image("logo_ayuntamiento_azul.png", width=150)
-    except:
+        from PIL import Image
+        
+        with Image.open(RUTA_LOGO) as imagen:
+            imagen.thumbnail((ancho, ancho))
+            buffer = io.BytesIO()
+            imagen.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+    except Exception:
         # Si no encuentra el logo, mostrar solo texto
-        pass
+        return None
+
+def render_header():
+    """Renderiza el header principal de la aplicación"""
+    logo = cargar_logo()
+    if logo:
+        st.image(logo, width=150)
     
     st.markdown("""
     <div class='main-header'>
@@ -76,15 +144,43 @@ def render_metric_card(title, value, icon="📊"):
     </div>
     """, unsafe_allow_html=True)
 
+def _sesion_iniciada():
+    return bool(getattr(st.user, "is_logged_in", False))
+
+def render_usuario():
+    """Sin inicio de sesión, pide en la barra lateral el nombre que se anota en el historial"""
+    if not _sesion_iniciada():
+        st.sidebar.text_input(
+            "👤 Tu nombre",
+            key="usuario",
+            help="Se anota en el historial de cambios de los objetivos que crees o modifiques"
+        )
+
+def obtener_usuario():
+    """Identidad con la que se anotan los cambios en el historial.
+    
+    Con inicio de sesión configurado es el correo de la cuenta; si no, el
+    nombre indicado en la barra lateral (puede quedar vacío).
+    """
+    if _sesion_iniciada():
+        return st.user.get("email") or st.user.get("name") or ""
+    return str(st.session_state.get("usuario", "")).strip()
+
 def main():
     # Header principal
     render_header()
     
-    # Inicializar estado de la sesión
-    if "objetivos" not in st.session_state:
-        st.session_state.objetivos = [""]
-        st.session_state.indicadores = [""]
-        st.session_state.responsables = [""]
+    # Inicializar estado de la sesión: el borrador se identifica en la URL
+    # para poder recuperarlo tras una reconexión o un redespliegue
+    if "borrador" not in st.session_state:
+        id_borrador = st.query_params.get("borrador") or uuid.uuid4().hex
+        st.query_params["borrador"] = id_borrador
+        st.session_state.id_borrador = id_borrador
+        st.session_state.borrador = obtener_almacen_borradores().cargar(id_borrador) or [ObjetivoBorrador()]
+        # Token de envío del formulario: reenviar con el mismo token no guarda nada
+        st.session_state.token_envio = uuid.uuid4().hex
+    
+    render_usuario()
     
     # Crear pestañas
     tab1, tab2 = st.tabs(["📝 Crear Objetivos", "📊 Ver Objetivos"])
@@ -94,6 +190,19 @@ def main():
     
     with tab2:
         render_ver_objetivos()
+    
+    if st.query_params.get("debug"):
+        render_estadisticas_rendimiento()
+
+def render_estadisticas_rendimiento():
+    """Muestra en la barra lateral los tiempos de arranque y de ejecución"""
+    estadisticas = rendimiento.obtener_estadisticas()
+    with st.sidebar.expander("⏱️ Rendimiento"):
+        if estadisticas["primer_pintado"] is not None:
+            st.write(f"Primer pintado: {estadisticas['primer_pintado']:.3f} s")
+        st.write(f"Ejecuciones: {estadisticas['ejecuciones']}")
+        st.write(f"Tiempo medio por ejecución: {estadisticas['tiempo_medio']:.3f} s")
+        st.write(f"Tiempo máximo por ejecución: {estadisticas['tiempo_maximo']:.3f} s")
 
 def render_crear_objetivos():
     """Renderiza la pestaña de creación de objetivos"""
@@ -149,9 +258,66 @@ def render_crear_objetivos():
     # Sección de descarga
     render_download_section(area, agrupar)
 
+@st.cache_resource
+def obtener_almacen_borradores():
+    """Devuelve el almacén local de borradores compartido por todas las sesiones"""
+    ruta = os.environ.get("BORRADORES_DB") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "borradores.sqlite3"
+    )
+    return AlmacenBorradores(ruta, intervalo=3.0)
+
+def _reemplazar_borrador(borrador):
+    """Sustituye el borrador de la sesión, con un token de envío nuevo.
+    
+    Se borra también el estado de los campos del formulario: si no, los
+    widgets conservarían el texto anterior e ignorarían el nuevo borrador.
+    """
+    for clave in list(st.session_state.keys()):
+        if str(clave).startswith(("obj_", "ind_", "resp_")):
+            del st.session_state[clave]
+    st.session_state.borrador = borrador or [ObjetivoBorrador()]
+    st.session_state.token_envio = uuid.uuid4().hex
+
+def reiniciar_borrador():
+    """Vacía el borrador de la sesión y elimina su copia guardada"""
+    _reemplazar_borrador([])
+    obtener_almacen_borradores().eliminar(st.session_state.id_borrador)
+
+def _cerrar_envio(token, huella, id_entrada, timestamp, area, agrupar, guardados):
+    """Registra los objetivos guardados de un envío y los quita del borrador.
+    
+    No usa elementos de Streamlit, para poder llamarse también cuando la
+    ejecución se ha interrumpido (p. ej. por un segundo clic). Devuelve el
+    error de registro, si lo hay.
+    """
+    error = None
+    try:
+        confirmar_envio(token, huella, id_entrada, timestamp, area, agrupar, guardados)
+    except Exception as e:
+        error = e
+    
+    # Los objetivos que fallaron quedan en el borrador, con un token nuevo
+    guardados = set(guardados)
+    pendientes = [
+        registro for registro in st.session_state.borrador
+        if tuple(campo.strip() for campo in astuple(registro)) not in guardados
+        and not registro.vacio()
+    ]
+    if pendientes:
+        _reemplazar_borrador(pendientes)
+    else:
+        reiniciar_borrador()
+    return error
+
+@st.fragment
 def render_objetivos_form():
-    """Renderiza el formulario de objetivos"""
-    for i in range(len(st.session_state.objetivos)):
+    """Renderiza el formulario de objetivos.
+    
+    Es un fragmento: editar un campo solo vuelve a ejecutar el formulario, y
+    cada ejecución programa el autoguardado del borrador.
+    """
+    borrador = st.session_state.borrador
+    for i, registro in enumerate(borrador):
         with st.container():
             st.markdown(f"<div class='objective-card'>", unsafe_allow_html=True)
             st.markdown(f"#### 🎯 Objetivo {i+1}")
@@ -159,9 +325,9 @@ def render_objetivos_form():
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                st.session_state.objetivos[i] = st.text_area(
+                registro.objetivo = st.text_area(
                     f"Descripción del objetivo {i+1}", 
-                    value=st.session_state.objetivos[i], 
+                    value=registro.objetivo, 
                     key=f"obj_{i}",
                     height=100,
                     help="Describe claramente el objetivo a alcanzar",
@@ -169,16 +335,16 @@ def render_objetivos_form():
                 )
             
             with col2:
-                st.session_state.indicadores[i] = st.text_input(
+                registro.indicador = st.text_input(
                     f"📊 Indicador {i+1}", 
-                    value=st.session_state.indicadores[i], 
+                    value=registro.indicador, 
                     key=f"ind_{i}",
                     help="Métrica para medir el cumplimiento",
                     placeholder="Ejemplo: % de satisfacción"
                 )
-                st.session_state.responsables[i] = st.text_input(
+                registro.responsable = st.text_input(
                     f"👤 Responsable {i+1}", 
-                    value=st.session_state.responsables[i], 
+                    value=registro.responsable, 
                     key=f"resp_{i}",
                     help="Persona responsable del objetivo",
                     placeholder="Nombre del responsable"
@@ -186,6 +352,8 @@ def render_objetivos_form():
             
             st.markdown("</div>", unsafe_allow_html=True)
             st.markdown("")
+    
+    obtener_almacen_borradores().programar(st.session_state.id_borrador, borrador)
 
 def render_control_buttons(area, agrupar):
     """Renderiza los botones de control"""
@@ -193,26 +361,20 @@ def render_control_buttons(area, agrupar):
 
     with col1:
         if st.button("➕ Nuevo objetivo", type="secondary", use_container_width=True):
-            st.session_state.objetivos.append("")
-            st.session_state.indicadores.append("")
-            st.session_state.responsables.append("")
+            st.session_state.borrador.append(ObjetivoBorrador())
             st.rerun()
 
     with col2:
         if st.button("🗑️ Borrar último", type="secondary", use_container_width=True):
-            if len(st.session_state.objetivos) > 1:
-                st.session_state.objetivos.pop()
-                st.session_state.indicadores.pop()
-                st.session_state.responsables.pop()
+            if len(st.session_state.borrador) > 1:
+                st.session_state.borrador.pop()
                 st.rerun()
             else:
                 st.warning("⚠️ Debe mantener al menos un objetivo")
 
     with col3:
         if st.button("♻️ Reiniciar", type="secondary", use_container_width=True):
-            st.session_state.objetivos = [""]
-            st.session_state.indicadores = [""]
-            st.session_state.responsables = [""]
+            reiniciar_borrador()
             st.rerun()
 
     with col4:
@@ -222,11 +384,7 @@ def render_control_buttons(area, agrupar):
 def procesar_envio_objetivos(area, agrupar):
     """Procesa el envío de objetivos"""
     objetivos_validos = []
-    for i, (obj, ind, resp) in enumerate(zip(
-        st.session_state.objetivos,
-        st.session_state.indicadores,
-        st.session_state.responsables
-    )):
+    for i, (obj, ind, resp) in enumerate(map(astuple, st.session_state.borrador)):
         if obj.strip() and ind.strip() and resp.strip():
             objetivos_validos.append((obj.strip(), ind.strip(), resp.strip()))
         elif obj.strip() or ind.strip() or resp.strip():
@@ -236,40 +394,65 @@ def procesar_envio_objetivos(area, agrupar):
         st.error("❌ No hay objetivos válidos para guardar. Complete al menos un objetivo con todos sus campos.")
     else:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        id_entrada = uuid.uuid4().hex[:8]
+        token = st.session_state.token_envio
         
-        errores = []
-        objetivos_guardados = 0
+        # El servicio asigna el id_entrada y descarta envíos repetidos
+        try:
+            id_entrada, huella = reservar_envio(token, area, agrupar, objetivos_validos)
+        except Exception as e:
+            st.error(f"❌ No se pudo registrar el envío: {e}")
+            return
+        
+        if id_entrada is None:
+            st.info("ℹ️ Estos objetivos ya se habían enviado; no se han guardado de nuevo.")
+            return
         
-        with st.spinner(f"💾 Guardando {len(objetivos_validos)} objetivos..."):
-            for obj, ind, resp in objetivos_validos:
-                try:
-                    guardar_objetivo(
-                        id_entrada=id_entrada,
-                        timestamp=timestamp,
-                        area=area,
-                        agrupacion=agrupar,
-                        objetivo=obj,
-                        indicador=ind,
-                        responsable=resp,
-                        estado="ACTIVO"
-                    )
-                    objetivos_guardados += 1
-                except Exception as e:
-                    errores.append(f"Error guardando objetivo: {e}")
+        usuario = obtener_usuario()
+        errores = []
+        guardados = []
+        confirmado = False
+        try:
+            with st.spinner(f"💾 Guardando {len(objetivos_validos)} objetivos..."):
+                for indice, (obj, ind, resp) in enumerate(objetivos_validos):
+                    try:
+                        guardar_objetivo(
+                            id_entrada=id_entrada,
+                            timestamp=timestamp,
+                            area=area,
+                            agrupacion=agrupar,
+                            objetivo=obj,
+                            indicador=ind,
+                            responsable=resp,
+                            estado="ACTIVO",
+                            indice=indice,
+                            usuario=usuario
+                        )
+                        guardados.append((obj, ind, resp))
+                    except Exception as e:
+                        errores.append(f"Error guardando objetivo: {e}")
+            
+            if guardados:
+                error_registro = _cerrar_envio(token, huella, id_entrada, timestamp, area, agrupar, guardados)
+                confirmado = True
+        finally:
+            # Si la ejecución se interrumpe (nuevo clic, desconexión...), no dejar
+            # la reserva colgada: liberarla si no se guardó nada, o registrar lo guardado
+            if not guardados:
+                liberar_envio(token, huella)
+            elif not confirmado:
+                _cerrar_envio(token, huella, id_entrada, timestamp, area, agrupar, guardados)
         
-        if objetivos_guardados > 0:
-            st.success(f"✅ {objetivos_guardados} objetivos guardados correctamente (ID: {id_entrada})")
+        if guardados:
+            if error_registro is not None:
+                st.warning(f"⚠️ No se pudo registrar el envío para evitar duplicados: {error_registro}")
+            st.success(f"✅ {len(guardados)} objetivos guardados correctamente (ID: {id_entrada})")
             
             if not errores:
-                st.session_state.objetivos = [""]
-                st.session_state.indicadores = [""]
-                st.session_state.responsables = [""]
                 time.sleep(2)
                 st.rerun()
         
         if errores:
-            st.error("❌ Algunos objetivos no se pudieron guardar:")
+            st.error("❌ Algunos objetivos no se pudieron guardar (siguen en el formulario para reintentarlo):")
             for error in errores:
                 st.error(f"• {error}")
 
@@ -279,11 +462,7 @@ def render_download_section(area, agrupar):
     
     if st.button("⬇️ Descargar en Excel", type="secondary", use_container_width=True):
         objetivos_con_contenido = []
-        for obj, ind, resp in zip(
-            st.session_state.objetivos,
-            st.session_state.indicadores,
-            st.session_state.responsables
-        ):
+        for obj, ind, resp in map(astuple, st.session_state.borrador):
             if obj.strip() or ind.strip() or resp.strip():
                 objetivos_con_contenido.append({
                     "Área": area,
@@ -359,6 +538,39 @@ def cargar_todos_objetivos_simple():
         st.error(f"Error cargando objetivos: {e}")
         return pd.DataFrame()
 
+def render_filtro_periodo(df_objetivos):
+    """Renderiza el filtro de fechas y devuelve las filas del periodo y su descripción"""
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        periodo = st.selectbox(
+            "📅 Periodo",
+            ["Todo"] + list(PERIODOS) + ["Rango personalizado"]
+        )
+    
+    desde = hasta = None
+    if periodo in PERIODOS:
+        desde, hasta = rango_periodo(periodo)
+    elif periodo == "Rango personalizado":
+        fechas_validas = df_objetivos['fecha'].dropna() if 'fecha' in df_objetivos.columns else pd.Series(dtype='datetime64[ns]')
+        hoy = datetime.now().date()
+        with col2:
+            rango = st.date_input(
+                "Desde / hasta",
+                value=(fechas_validas.iloc[-1].date() if not fechas_validas.empty else hoy, hoy),
+                format="DD/MM/YYYY"
+            )
+        if len(rango) == 2:
+            desde = pd.Timestamp(rango[0])
+            hasta = pd.Timestamp(rango[1]) + pd.Timedelta(days=1)
+        periodo = "_".join(str(fecha) for fecha in rango)
+    
+    if periodo in PERIODOS:
+        with col2:
+            st.caption(f"Del {desde:%d/%m/%Y} al {hasta - pd.Timedelta(days=1):%d/%m/%Y}")
+    
+    return filtrar_por_fechas(df_objetivos, desde, hasta), periodo
+
 def render_ver_objetivos():
     """Renderiza la pestaña de visualización de objetivos"""
     st.markdown("### 📊 Todos los Objetivos")
@@ -377,56 +589,93 @@ def render_ver_objetivos():
         st.info("ℹ️ No hay objetivos guardados. Crea algunos objetivos en la pestaña 'Crear Objetivos' para verlos aquí.")
         return
     
+    # Agregados incrementales: métricas y desgloses sin recorrer las filas
+    try:
+        from gsheets_service import obtener_agregados
+        agregados = obtener_agregados()
+    except ImportError:
+        agregados = AgregadosObjetivos.desde_dataframe(df_objetivos)
+    
     # Mostrar métricas generales
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        render_metric_card("Total Objetivos", len(df_objetivos), "🎯")
+        render_metric_card("Total Objetivos", agregados.total, "🎯")
     
     with col2:
-        areas_unicas = df_objetivos['area'].nunique() if 'area' in df_objetivos.columns else 0
-        render_metric_card("Áreas", areas_unicas, "🏢")
+        render_metric_card("Áreas", agregados.n_areas, "🏢")
     
     with col3:
-        responsables_unicos = df_objetivos['responsable'].nunique() if 'responsable' in df_objetivos.columns else 0
-        render_metric_card("Responsables", responsables_unicos, "👤")
+        render_metric_card("Responsables", agregados.n_responsables, "👤")
     
     with col4:
-        if 'estado' in df_objetivos.columns:
-            objetivos_activos = len(df_objetivos[df_objetivos['estado'] == 'ACTIVO'])
-        else:
-            objetivos_activos = len(df_objetivos)
-        render_metric_card("Activos", objetivos_activos, "✅")
+        render_metric_card("Activos", agregados.contar_estado('ACTIVO'), "✅")
+    
+    with st.expander("📈 Desglose por área y por mes"):
+        render_desglose_agregados(agregados)
     
     st.divider()
     
     # Filtros
     st.markdown("### 🔍 Filtros")
-    col1, col2, col3 = st.columns(3)
     
-    with col1:
-        if 'area' in df_objetivos.columns:
-            areas_disponibles = ['Todas'] + sorted(df_objetivos['area'].unique().tolist())
-            area_filtro = st.selectbox("🏢 Filtrar por Área", areas_disponibles)
-        else:
-            area_filtro = 'Todas'
+    # Filtro de fechas: se resuelve por búsqueda binaria sobre la columna 'fecha' ordenada
+    if 'fecha' not in df_objetivos.columns:
+        df_objetivos = indexar_fechas(df_objetivos)
+    df_periodo, periodo_filtro = render_filtro_periodo(df_objetivos)
     
-    with col2:
-        if 'estado' in df_objetivos.columns:
-            estados_disponibles = ['Todos'] + sorted(df_objetivos['estado'].unique().tolist())
-            estado_filtro = st.selectbox("📊 Filtrar por Estado", estados_disponibles)
-        else:
-            estado_filtro = 'Todos'
+    # Filtros facetados: las opciones y sus recuentos reflejan las demás selecciones.
+    # Los recuentos salen de la tabla de conteos por combinación (los agregados
+    # incrementales, o una agrupación de las filas del periodo si se filtra por fecha)
+    if periodo_filtro == "Todo":
+        conteos = conteos_desde_agregados(agregados)
+    else:
+        conteos = conteos_grupos(df_periodo)
+    
+    filtros = [
+        ('area', "🏢 Filtrar por Área", 'Todas'),
+        ('estado', "📊 Filtrar por Estado", 'Todos'),
+        ('responsable', "👤 Filtrar por Responsable", 'Todos'),
+    ]
+    seleccion = {}
+    for faceta, _, todos in filtros:
+        valor = st.session_state.get(f"filtro_{faceta}", todos)
+        seleccion[faceta] = None if valor == todos else valor
+    recuentos = contar_facetas(conteos, seleccion)
+    
+    valores_filtro = {}
+    for col, (faceta, etiqueta, todos) in zip(st.columns(3), filtros):
+        with col:
+            if faceta not in df_objetivos.columns:
+                valores_filtro[faceta] = todos
+                continue
+            
+            recuento = recuentos.get(faceta, pd.Series(dtype='int64'))
+            opciones = sorted(recuento[recuento > 0].index.tolist())
+            # Mantener la selección actual aunque ya no tenga objetivos
+            if seleccion[faceta] is not None and seleccion[faceta] not in opciones:
+                opciones.append(seleccion[faceta])
+            total = int(recuento.sum())
+            
+            # Las etiquetas llevan los recuentos y forman parte del identificador del
+            # widget: al cambiar otra faceta el widget es "nuevo" y volvería a 'Todas'.
+            # Reescribir la selección en session_state la conserva.
+            st.session_state[f"filtro_{faceta}"] = todos if seleccion[faceta] is None else seleccion[faceta]
+            valores_filtro[faceta] = st.selectbox(
+                etiqueta,
+                [todos] + opciones,
+                key=f"filtro_{faceta}",
+                format_func=lambda valor, todos=todos, recuento=recuento, total=total: (
+                    f"{valor} ({total})" if valor == todos else f"{valor} ({int(recuento.get(valor, 0))})"
+                )
+            )
     
-    with col3:
-        if 'responsable' in df_objetivos.columns:
-            responsables_disponibles = ['Todos'] + sorted(df_objetivos['responsable'].unique().tolist())
-            responsable_filtro = st.selectbox("👤 Filtrar por Responsable", responsables_disponibles)
-        else:
-            responsable_filtro = 'Todos'
+    area_filtro = valores_filtro['area']
+    estado_filtro = valores_filtro['estado']
+    responsable_filtro = valores_filtro['responsable']
     
-    # Aplicar filtros
-    df_filtrado = df_objetivos.copy()
+    # Aplicar filtros (sobre las filas del periodo ya recortadas)
+    df_filtrado = df_periodo
     
     if area_filtro != 'Todas' and 'area' in df_filtrado.columns:
         df_filtrado = df_filtrado[df_filtrado['area'] == area_filtro]
@@ -449,8 +698,8 @@ def render_ver_objetivos():
         columnas_mostrar = []
         nombres_columnas = []
         
-        if 'timestamp' in df_filtrado.columns:
-            columnas_mostrar.append('timestamp')
+        if 'fecha' in df_filtrado.columns:
+            columnas_mostrar.append('fecha')
             nombres_columnas.append('Fecha')
         if 'area' in df_filtrado.columns:
             columnas_mostrar.append('area')
@@ -475,19 +724,25 @@ def render_ver_objetivos():
         df_display.columns = nombres_columnas
         
         if 'Fecha' in df_display.columns:
-            try:
-                df_display['Fecha'] = pd.to_datetime(df_display['Fecha']).dt.strftime('%d/%m/%Y %H:%M')
-            except:
-                pass
+            df_display['Fecha'] = df_display['Fecha'].dt.strftime('%d/%m/%Y %H:%M').fillna('')
         
-        # Mostrar tabla con estilo
-        st.markdown("<div class='data-table'>", unsafe_allow_html=True)
-        st.dataframe(
-            df_display,
-            use_container_width=True,
-            hide_index=True
-        )
-        st.markdown("</div>", unsafe_allow_html=True)
+        vista = st.radio("Vista", ["📋 Tabla", "🗂️ Tarjetas"], horizontal=True, label_visibility="collapsed")
+        
+        if vista == "🗂️ Tarjetas":
+            # Tarjetas por páginas; al cambiar los filtros se vuelve a la primera página
+            render_objective_cards(
+                df_filtrado,
+                clave=f"tarjetas_{periodo_filtro}_{area_filtro}_{estado_filtro}_{responsable_filtro}"
+            )
+        else:
+            # Mostrar tabla con estilo
+            st.markdown("<div class='data-table'>", unsafe_allow_html=True)
+            st.dataframe(
+                df_display,
+                use_container_width=True,
+                hide_index=True
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
         
         # Botón de descarga para datos filtrados
         if st.button("📥 Descargar datos filtrados", type="secondary"):
@@ -501,6 +756,63 @@ def render_ver_objetivos():
                 file_name=f"objetivos_filtrados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+        
+        if 'id_entrada' in df_filtrado.columns:
+            render_historial_objetivos(df_filtrado)
+
+ESTADOS_OBJETIVO = ["ACTIVO", "PAUSADO", "FINALIZADO"]
+
+def render_historial_objetivos(df_objetivos):
+    """Renderiza el historial de cambios de una entrada y permite cambiar el estado de sus objetivos"""
+    from gsheets_service import cambiar_estado_objetivo, cargar_estado_actual, cargar_historial
+    
+    with st.expander("🕓 Historial de cambios"):
+        entradas = df_objetivos['id_entrada'].astype(str).unique().tolist()
+        id_entrada = st.selectbox("🔑 ID de entrada", entradas, key="historial_entrada")
+        if not id_entrada:
+            return
+        
+        if st.button("🔄 Cargar historial", key="historial_cargar"):
+            st.session_state.historial_id = id_entrada
+        
+        if st.session_state.get("historial_id") != id_entrada:
+            return
+        
+        estado_actual = cargar_estado_actual()
+        objetivos_entrada = estado_actual[estado_actual['id_entrada'] == id_entrada]
+        st.markdown("**Estado actual**")
+        st.dataframe(
+            objetivos_entrada[['indice', 'objetivo', 'responsable', 'estado', 'fecha_cambio_estado']],
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        st.markdown("**Eventos**")
+        eventos = cargar_historial(id_entrada)
+        if eventos.empty:
+            st.info("ℹ️ No hay eventos registrados para esta entrada.")
+        else:
+            eventos = eventos.assign(datos=eventos['datos'].astype(str))
+            st.dataframe(
+                eventos[['timestamp', 'tipo', 'indice', 'usuario', 'datos']],
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        if not objetivos_entrada.empty:
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col1:
+                indice = st.selectbox("🎯 Objetivo", objetivos_entrada['indice'].tolist(), key="historial_indice")
+            with col2:
+                nuevo_estado = st.selectbox("📊 Nuevo estado", ESTADOS_OBJETIVO, key="historial_estado")
+            with col3:
+                if st.button("💾 Cambiar estado", type="primary", use_container_width=True):
+                    if cambiar_estado_objetivo(id_entrada, indice, nuevo_estado, usuario=obtener_usuario()):
+                        st.success("✅ Estado actualizado")
+                        st.rerun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        rendimiento.registrar_ejecucion(_inicio_ejecucion)
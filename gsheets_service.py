@@ -1,8 +1,20 @@
-import gspread
 import streamlit as st
+from streamlit import runtime
 import pandas as pd
-from google.oauth2.service_account import Credentials
+import json
+import logging
+import os
 import time
+import uuid
+from datetime import datetime
+from agregados import AgregadosObjetivos
+from periodos import indexar_fechas
+from envios import COLUMNAS_ENVIOS, RegistroEnvios, huella_envio
+from historial import (
+    COLUMNAS_EVENTOS, COLUMNAS_SNAPSHOT, EVENTO_CAMBIO_ESTADO, EVENTO_CREADO, EVENTO_EDITADO,
+    CAMPOS_EDITABLES, IndiceEventos, aplicar_eventos, estado_a_dataframe, estado_a_filas,
+    estado_desde_filas, evento_a_fila, fila_a_evento
+)
 
 SCOPE = [
     "https://spreadsheets.google.com/feeds",
@@ -11,58 +23,111 @@ SCOPE = [
     "https://www.googleapis.com/auth/drive"
 ]
 
+# Mensajes: en la aplicación se muestran con Streamlit; fuera de ella
+# (p. ej. desde la línea de comandos) se envían al log
+logger = logging.getLogger("formulario_objetivos.gsheets")
+
+def _en_streamlit():
+    return runtime.exists()
+
+def _error(mensaje):
+    if _en_streamlit():
+        st.error(mensaje)
+    else:
+        logger.error(mensaje)
+
+def _aviso(mensaje):
+    if _en_streamlit():
+        st.warning(mensaje)
+    else:
+        logger.warning(mensaje)
+
+def _exito(mensaje):
+    if _en_streamlit():
+        st.success(mensaje)
+    else:
+        logger.info(mensaje)
+
 def cargar_credenciales():
-    """Carga las credenciales desde los secretos de Streamlit"""
+    """Carga las credenciales de la cuenta de servicio.
+    
+    Por orden: fichero indicado en GOOGLE_APPLICATION_CREDENTIALS, JSON en la
+    variable GCP_SERVICE_ACCOUNT_JSON o los secretos de Streamlit.
+    """
     try:
+        # Importación diferida: google-auth solo se carga al conectar con Sheets
+        from google.oauth2.service_account import Credentials
+        
+        ruta = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+        if ruta:
+            return Credentials.from_service_account_file(ruta, scopes=SCOPE)
+        
+        info_json = os.environ.get("GCP_SERVICE_ACCOUNT_JSON")
+        if info_json:
+            return Credentials.from_service_account_info(json.loads(info_json), scopes=SCOPE)
+        
         info = st.secrets["gcp_service_account"]
         return Credentials.from_service_account_info(info, scopes=SCOPE)
     except Exception as e:
-        st.error(f"Error cargando credenciales: {e}")
+        _error(f"Error cargando credenciales: {e}")
         return None
 
+def obtener_sheet_id():
+    """Devuelve el ID del Google Sheets: variable SHEET_ID o secretos de Streamlit"""
+    return os.environ.get("SHEET_ID") or st.secrets["sheet_id"]
+
 def inicializar_cliente():
     """Inicializa el cliente de Google Sheets"""
     try:
+        import gspread
+        
         creds = cargar_credenciales()
         if creds is None:
             return None
         return gspread.authorize(creds)
     except Exception as e:
-        st.error(f"Error inicializando cliente: {e}")
+        _error(f"Error inicializando cliente: {e}")
         return None
 
 def cargar_hoja_estado():
     """Carga la hoja 'estado' del Google Sheets, la crea si no existe"""
     try:
+        import gspread
+        
         client = inicializar_cliente()
         if client is None:
             return None
         
-        sheet = client.open_by_key(st.secrets["sheet_id"])
+        sheet = client.open_by_key(obtener_sheet_id())
         
         try:
             # Intentar cargar la hoja existente
             return sheet.worksheet("estado")
         except gspread.WorksheetNotFound:
             # Si no existe, crearla
-            st.warning("La hoja 'estado' no existe. Creándola automáticamente...")
+            _aviso("La hoja 'estado' no existe. Creándola automáticamente...")
             worksheet = sheet.add_worksheet(title="estado", rows="1000", cols="10")
             
             # Agregar encabezados
             headers = [
                 "id_entrada", "timestamp", "area", "agrupacion", 
-                "objetivo", "indicador", "responsable", "estado", "fecha_cambio_estado"
+                "objetivo", "indicador", "responsable", "estado", "fecha_cambio_estado", "indice"
             ]
             worksheet.append_row(headers)
-            st.success("Hoja 'estado' creada correctamente con los encabezados necesarios.")
+            _exito("Hoja 'estado' creada correctamente con los encabezados necesarios.")
             return worksheet
             
     except Exception as e:
-        st.error(f"Error conectando con Google Sheets (Objetivos): {e}")
+        _error(f"Error conectando con Google Sheets (Objetivos): {e}")
         return None
 
-def guardar_objetivo(id_entrada, timestamp, area, agrupacion, objetivo, indicador, responsable, estado):
-    """Guarda un objetivo en la hoja de estado"""
+def guardar_objetivo(id_entrada, timestamp, area, agrupacion, objetivo, indicador, responsable, estado, indice=0, usuario=""):
+    """Guarda un objetivo en la hoja de estado y registra el evento de creación.
+    
+    `indice` es la posición del objetivo dentro de su entrada y, junto con
+    `id_entrada`, lo identifica en el registro de eventos. `usuario` es quien
+    lo crea, tal como se anota en el historial.
+    """
     hoja = cargar_hoja_estado()
     if hoja is None:
         raise Exception("No se pudo conectar con la hoja de objetivos")
@@ -85,9 +150,10 @@ def guardar_objetivo(id_entrada, timestamp, area, agrupacion, objetivo, indicado
                     str(indicador),
                     str(responsable),
                     str(estado),
-                    str(timestamp)  # fecha_cambio_estado
+                    str(timestamp),  # fecha_cambio_estado
+                    str(indice)
                 ])
-                return True
+                break
             except Exception as e:
                 if intento < max_intentos - 1:
                     time.sleep(1)  # Esperar un segundo antes del siguiente intento
@@ -96,21 +162,41 @@ def guardar_objetivo(id_entrada, timestamp, area, agrupacion, objetivo, indicado
                     raise e
     except Exception as e:
         raise Exception(f"Error al guardar objetivo: {e}")
+    
+    invalidar_cache_objetivos()
+    
+    # El objetivo ya está guardado: un fallo del registro de eventos solo se avisa
+    try:
+        registrar_evento(EVENTO_CREADO, id_entrada, indice, {
+            "timestamp": str(timestamp),
+            "area": str(area),
+            "agrupacion": str(agrupacion),
+            "objetivo": str(objetivo),
+            "indicador": str(indicador),
+            "responsable": str(responsable),
+            "estado": str(estado),
+            "fecha_cambio_estado": str(timestamp),
+        }, usuario=usuario, timestamp=timestamp)
+    except Exception as e:
+        _aviso(f"El objetivo se guardó pero no se pudo registrar en el historial: {e}")
+    return True
 
 def cargar_areas_agrupaciones():
     """Carga las áreas y agrupaciones desde Google Sheets, crea la hoja si no existe"""
     try:
+        import gspread
+        
         client = inicializar_cliente()
         if client is None:
             return pd.DataFrame()
         
-        sheet = client.open_by_key(st.secrets["sheet_id"])
+        sheet = client.open_by_key(obtener_sheet_id())
         
         try:
             ws = sheet.worksheet("Areas_Agrupaciones")
         except gspread.WorksheetNotFound:
             # Crear la hoja si no existe
-            st.warning("La hoja 'Areas_Agrupaciones' no existe. Creándola automáticamente...")
+            _aviso("La hoja 'Areas_Agrupaciones' no existe. Creándola automáticamente...")
             ws = sheet.add_worksheet(title="Areas_Agrupaciones", rows="100", cols="5")
             
             # Agregar encabezados y algunos datos de ejemplo
@@ -127,7 +213,7 @@ def cargar_areas_agrupaciones():
             for ejemplo in ejemplos:
                 ws.append_row(ejemplo)
             
-            st.success("Hoja 'Areas_Agrupaciones' creada con datos de ejemplo.")
+            _exito("Hoja 'Areas_Agrupaciones' creada con datos de ejemplo.")
         
         data = ws.get_all_records()
         df = pd.DataFrame(data)
@@ -143,21 +229,21 @@ def cargar_areas_agrupaciones():
         
         return df
     except Exception as e:
-        st.error(f"Error conectando con Google Sheets (Áreas/Agrupaciones): {e}")
+        _error(f"Error conectando con Google Sheets (Áreas/Agrupaciones): {e}")
         return pd.DataFrame()
 
 def guardar_nueva_agrupacion(area, nueva_agrupacion):
     """Guarda una nueva agrupación funcional"""
     try:
         if not area.strip() or not nueva_agrupacion.strip():
-            st.error("Área y agrupación no pueden estar vacías")
+            _error("Área y agrupación no pueden estar vacías")
             return False
         
         client = inicializar_cliente()
         if client is None:
             return False
         
-        sheet = client.open_by_key(st.secrets["sheet_id"])
+        sheet = client.open_by_key(obtener_sheet_id())
         ws = sheet.worksheet("Areas_Agrupaciones")
         
         # Verificar si la combinación ya existe
@@ -165,56 +251,459 @@ def guardar_nueva_agrupacion(area, nueva_agrupacion):
         for row in existing_data:
             if (str(row.get('Area', '')).strip().lower() == area.strip().lower() and 
                 str(row.get('Agrupacion_Funcional', '')).strip().lower() == nueva_agrupacion.strip().lower()):
-                st.warning("Esta combinación de área y agrupación ya existe")
+                _aviso("Esta combinación de área y agrupación ya existe")
                 return False
         
         ws.append_row([area.strip(), nueva_agrupacion.strip()])
-        st.success("Nueva agrupación funcional guardada correctamente.")
+        _exito("Nueva agrupación funcional guardada correctamente.")
         return True
     except Exception as e:
-        st.error(f"No se pudo guardar la nueva agrupación funcional: {e}")
+        _error(f"No se pudo guardar la nueva agrupación funcional: {e}")
         return False
 
+@st.cache_resource
+def obtener_agregados():
+    """Devuelve los agregados de objetivos compartidos por todas las sesiones"""
+    return AgregadosObjetivos()
+
+# Columnas de la hoja 'estado' que necesitan la vista, los filtros y los agregados
+COLUMNAS_VISTA = ["id_entrada", "timestamp", "area", "agrupacion", "objetivo", "indicador", "responsable", "estado"]
+
+def leer_columnas(hoja, columnas):
+    """Lee solo las columnas indicadas de una hoja y construye el DataFrame por columnas.
+    
+    Se pide un rango por columna en una única llamada batch_get con valores sin
+    formato, evitando descargar el resto de columnas y crear un diccionario por fila.
+    """
+    from gspread.utils import ValueRenderOption, rowcol_to_a1
+    
+    encabezados = hoja.row_values(1)
+    presentes = [col for col in columnas if col in encabezados]
+    if not presentes:
+        return pd.DataFrame()
+    
+    rangos = []
+    for col in presentes:
+        letra = rowcol_to_a1(1, encabezados.index(col) + 1).rstrip("0123456789")
+        rangos.append(f"{letra}2:{letra}")
+    
+    respuesta = hoja.batch_get(
+        rangos,
+        major_dimension="COLUMNS",
+        value_render_option=ValueRenderOption.unformatted
+    )
+    # Cada rango devuelve [[v1, v2, ...]]; Sheets recorta las celdas vacías del final
+    valores = [rango[0] if rango else [] for rango in respuesta]
+    n_filas = max((len(columna) for columna in valores), default=0)
+    return pd.DataFrame({
+        col: columna + [""] * (n_filas - len(columna))
+        for col, columna in zip(presentes, valores)
+    })
+
+def _descargar_objetivos(columnas):
+    """Lee y limpia los objetivos de la hoja 'estado'; devuelve el DataFrame ordenado por fecha.
+    
+    La columna 'fila' conserva el orden de la hoja, que necesitan los agregados.
+    """
+    hoja = cargar_hoja_estado()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de objetivos")
+    
+    # 'objetivo' siempre es necesaria para descartar filas vacías
+    columnas = list(columnas) + [col for col in ["objetivo"] if col not in columnas]
+    df = leer_columnas(hoja, columnas)
+    
+    if df.empty or 'objetivo' not in df.columns:
+        return pd.DataFrame()
+    
+    # Limpiar espacios en blanco (los valores sin formato pueden ser números)
+    for col in df.columns:
+        df[col] = df[col].astype(str).str.strip()
+    
+    # Filtrar filas con datos válidos
+    df = df[(df['objetivo'] != '') & (df['objetivo'] != 'nan')]
+    df = df.assign(fila=range(len(df)))
+    
+    # Convertir el timestamp una sola vez y ordenar por fecha (más recientes primero)
+    return indexar_fechas(df)
+
+@st.cache_resource
+def obtener_cache_objetivos():
+    """Devuelve la caché Arrow compartida entre procesos de la hoja 'estado', o None sin pyarrow"""
+    try:
+        from cache_compartida import CacheColumnar
+    except ImportError:
+        return None
+    return CacheColumnar(
+        "estado",
+        directorio=os.environ.get("OBJETIVOS_CACHE_DIR"),
+        ttl=float(os.environ.get("OBJETIVOS_CACHE_TTL", "60"))
+    )
+
+def invalidar_cache_objetivos():
+    """Fuerza que la próxima lectura de objetivos vuelva a descargar la hoja"""
+    cache = obtener_cache_objetivos()
+    if cache is not None:
+        cache.invalidar()
+
 # FUNCIÓN ADICIONAL PARA LA NUEVA PESTAÑA
-def cargar_todos_objetivos():
-    """Carga todos los objetivos desde Google Sheets"""
+def cargar_todos_objetivos(columnas=COLUMNAS_VISTA):
+    """Carga los objetivos (solo las columnas indicadas).
+    
+    Con las columnas por defecto se usa la caché compartida entre procesos:
+    solo un proceso descarga la hoja cuando caduca y el resto la mapea en memoria.
+    """
     try:
-        hoja = cargar_hoja_estado()
-        if hoja is None:
-            return pd.DataFrame()
+        cache = obtener_cache_objetivos()
+        if cache is not None and list(columnas) == COLUMNAS_VISTA:
+            df, version = cache.obtener(lambda: _descargar_objetivos(columnas))
+        else:
+            df, version = _descargar_objetivos(columnas), None
         
-        # Obtener todos los datos
-        data = hoja.get_all_records()
+        # Actualizar los agregados con las filas nuevas o modificadas (en el
+        # orden de la hoja); con la caché, solo la primera vez que se abre cada
+        # versión, sin reordenar las filas en cada ejecución
+        agregados = obtener_agregados()
+        if 'fila' in df.columns and (version is None or version != agregados.version):
+            agregados.sincronizar(df.sort_values('fila'), version=version)
         
-        if not data:
-            return pd.DataFrame()
+        return df
         
-        df = pd.DataFrame(data)
+    except Exception as e:
+        _error(f"Error cargando objetivos: {e}")
+        return pd.DataFrame()
+
+# REGISTRO DE EVENTOS (HISTORIAL) Y SNAPSHOTS COMPACTADOS
+
+# Número de eventos posteriores al snapshot a partir del cual se compacta
+UMBRAL_COMPACTACION = 500
+
+# Hojas de snapshot: se escribe siempre en la que no está vigente y después se
+# cambia la vigente en 'snapshot_meta', así nadie lee una hoja a medio escribir
+HOJAS_SNAPSHOT = ("snapshot", "snapshot_b")
+
+# Segundos que se reutilizan el estado y el historial leídos (las escrituras
+# de este proceso los invalidan antes)
+HISTORIAL_CACHE_TTL = 60
+
+def _cargar_o_crear_hoja(nombre, encabezados):
+    """Carga una hoja auxiliar del Google Sheets, la crea con sus encabezados si no existe"""
+    import gspread
+    
+    client = inicializar_cliente()
+    if client is None:
+        return None
+    
+    sheet = client.open_by_key(obtener_sheet_id())
+    try:
+        return sheet.worksheet(nombre)
+    except gspread.WorksheetNotFound:
+        worksheet = sheet.add_worksheet(title=nombre, rows="1000", cols=str(len(encabezados)))
+        worksheet.append_row(encabezados)
+        return worksheet
+
+def cargar_hoja_eventos():
+    """Carga la hoja 'eventos' (registro de auditoría de solo anexado)"""
+    return _cargar_o_crear_hoja("eventos", COLUMNAS_EVENTOS)
+
+def cargar_hoja_snapshot(nombre=HOJAS_SNAPSHOT[0]):
+    """Carga una de las hojas de snapshot (HOJAS_SNAPSHOT) con un estado compactado"""
+    return _cargar_o_crear_hoja(nombre, COLUMNAS_SNAPSHOT)
+
+def cargar_hoja_snapshot_meta():
+    """Carga la hoja 'snapshot_meta': una fila por compactación con los eventos que incluye y su hoja"""
+    return _cargar_o_crear_hoja("snapshot_meta", ["timestamp", "eventos_incluidos", "hoja"])
+
+@st.cache_resource
+def obtener_indice_eventos():
+    """Devuelve el índice id_entrada -> filas de eventos compartido por todas las sesiones"""
+    return IndiceEventos()
+
+def _ahora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def registrar_evento(tipo, id_entrada, indice, datos, usuario="", timestamp=None):
+    """Añade un evento (creado, editado, cambio_estado) al registro de auditoría"""
+    hoja = cargar_hoja_eventos()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de eventos")
+    
+    timestamp = timestamp or _ahora()
+    id_evento = f"{id_entrada}-{indice}-{time.time_ns()}"
+    hoja.append_row(
+        evento_a_fila(id_evento, timestamp, tipo, id_entrada, indice, usuario, datos),
+        value_input_option="RAW"
+    )
+    _estado_actual.clear()
+    _historial.clear()
+
+def _ultimo_snapshot():
+    """Devuelve (eventos incluidos, hoja) del último snapshot, o (None, None) si no hay ninguno"""
+    hoja_meta = cargar_hoja_snapshot_meta()
+    if hoja_meta is None:
+        raise Exception("No se pudo conectar con la hoja de snapshots")
+    
+    filas = [fila for fila in hoja_meta.get("B2:C") if fila and fila[0]]
+    if not filas:
+        return None, None
+    # Las compactaciones anteriores al doble búfer no guardaban la hoja
+    ultima = filas[-1]
+    return int(ultima[0]), (ultima[1] if len(ultima) > 1 and ultima[1] else HOJAS_SNAPSHOT[0])
+
+def _leer_eventos_desde(posicion):
+    """Lee los eventos posteriores a los `posicion` primeros (sin leer los anteriores)"""
+    hoja = cargar_hoja_eventos()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de eventos")
+    
+    # La fila 1 son los encabezados: el evento n está en la fila n + 1
+    filas = hoja.get(f"A{posicion + 2}:G")
+    return [fila_a_evento(fila) for fila in filas if any(fila)]
+
+# Columna (J) de 'estado' con el índice del objetivo dentro de su entrada
+COLUMNA_INDICE = 10
+LETRA_COLUMNA_INDICE = "J"
+
+def _indice_guardado(valor, posicion):
+    """Índice de un objetivo a partir de su celda de la columna 'indice'.
+    
+    No coincide necesariamente con su posición entre las filas de la entrada:
+    si un envío se guarda solo en parte, faltan los índices que fallaron. Las
+    filas anteriores a la columna 'indice' usan la posición.
+    """
+    return str(valor).strip() or str(posicion)
+
+def _estado_inicial_desde_hoja_estado():
+    """Construye el estado inicial a partir de la hoja 'estado' (antes del primer snapshot)"""
+    hoja = cargar_hoja_estado()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de objetivos")
+    
+    valores = hoja.get_all_values()
+    if not valores:
+        return {}
+    
+    encabezados = valores[0]
+    estado = {}
+    siguientes_indices = {}
+    for fila in valores[1:]:
+        datos = dict(zip(encabezados, fila))
+        if not str(datos.get("objetivo", "")).strip():
+            continue
+        id_entrada = str(datos.get("id_entrada", ""))
+        posicion = siguientes_indices.get(id_entrada, 0)
+        siguientes_indices[id_entrada] = posicion + 1
+        indice = _indice_guardado(fila[COLUMNA_INDICE - 1] if len(fila) >= COLUMNA_INDICE else "", posicion)
+        estado[(id_entrada, str(indice))] = {
+            **{col: str(datos.get(col, "")) for col in COLUMNAS_SNAPSHOT},
+            "id_entrada": id_entrada,
+            "indice": str(indice),
+        }
+    return estado
+
+def compactar_snapshot(estado, eventos_incluidos, hoja_vigente=None):
+    """Escribe un snapshot del estado actual que incluye los primeros `eventos_incluidos` eventos.
+    
+    Se escribe en la hoja de HOJAS_SNAPSHOT que no es `hoja_vigente` y solo
+    después se marca como vigente: quien esté leyendo el snapshot anterior no
+    ve nunca una hoja vacía o a medio escribir.
+    """
+    destino = next(nombre for nombre in HOJAS_SNAPSHOT if nombre != hoja_vigente)
+    hoja = cargar_hoja_snapshot(destino)
+    hoja_meta = cargar_hoja_snapshot_meta()
+    if hoja is None or hoja_meta is None:
+        raise Exception("No se pudo conectar con la hoja de snapshots")
+    
+    # Primero el snapshot y después la marca: si se interrumpe entre ambos, la
+    # marca sigue apuntando al snapshot anterior, que no se ha tocado
+    hoja.clear()
+    hoja.update([COLUMNAS_SNAPSHOT] + estado_a_filas(estado), "A1", value_input_option="RAW")
+    hoja_meta.append_row([_ahora(), str(eventos_incluidos), destino], value_input_option="RAW")
+
+@st.cache_data(ttl=HISTORIAL_CACHE_TTL, show_spinner=False)
+def _estado_actual():
+    incluidos, nombre_hoja = _ultimo_snapshot()
+    if incluidos is None:
+        # Los objetivos ya guardados están en la hoja 'estado', incluidos
+        # los que tengan evento de creación: el snapshot cubre todos los eventos
+        # (se cuentan antes de leer 'estado' para no perder eventos concurrentes)
+        incluidos = len(cargar_hoja_eventos().col_values(1)[1:])
+        estado = _estado_inicial_desde_hoja_estado()
+        compactar_snapshot(estado, incluidos)
+        return estado_a_dataframe(estado)
+    
+    hoja = cargar_hoja_snapshot(nombre_hoja)
+    estado = estado_desde_filas(hoja.get_all_values()[1:])
+    eventos = _leer_eventos_desde(incluidos)
+    aplicar_eventos(estado, eventos)
+    
+    if len(eventos) > UMBRAL_COMPACTACION:
+        compactar_snapshot(estado, incluidos + len(eventos), nombre_hoja)
+    
+    return estado_a_dataframe(estado)
+
+def cargar_estado_actual():
+    """Carga el estado actual de los objetivos desde el último snapshot más los eventos posteriores.
+    
+    Si no existe ningún snapshot, el primero se crea a partir de la hoja 'estado'.
+    Cuando se acumulan más de UMBRAL_COMPACTACION eventos tras el snapshot, se
+    compacta uno nuevo (en la otra hoja de snapshot, ver compactar_snapshot).
+    El resultado se reutiliza hasta que se registra un evento o pasan
+    HISTORIAL_CACHE_TTL segundos.
+    """
+    try:
+        return _estado_actual()
+    except Exception as e:
+        _error(f"Error cargando el estado de los objetivos: {e}")
+        return pd.DataFrame(columns=COLUMNAS_SNAPSHOT)
+
+@st.cache_data(ttl=HISTORIAL_CACHE_TTL, show_spinner=False)
+def _historial(id_entrada):
+    hoja = cargar_hoja_eventos()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de eventos")
+    
+    # Ampliar el índice solo con las filas añadidas desde la última consulta
+    indice = obtener_indice_eventos()
+    desde = indice.filas_indexadas
+    nuevos_ids = hoja.get(f"D{desde + 2}:D")
+    indice.ampliar((fila[0] if fila else "" for fila in nuevos_ids), desde)
+    
+    filas = indice.filas(id_entrada)
+    if not filas:
+        return pd.DataFrame(columns=COLUMNAS_EVENTOS)
+    
+    rangos = hoja.batch_get([f"A{fila}:G{fila}" for fila in filas])
+    eventos = [fila_a_evento(rango[0]) for rango in rangos if rango]
+    return pd.DataFrame(eventos, columns=COLUMNAS_EVENTOS)
+
+def cargar_historial(id_entrada):
+    """Devuelve los eventos de una entrada, leyendo solo sus filas de la hoja de eventos.
+    
+    El resultado se reutiliza hasta que se registra un evento o pasan
+    HISTORIAL_CACHE_TTL segundos.
+    """
+    try:
+        return _historial(str(id_entrada))
+    except Exception as e:
+        _error(f"Error cargando el historial: {e}")
+        return pd.DataFrame(columns=COLUMNAS_EVENTOS)
+
+def _fila_objetivo(hoja, id_entrada, indice):
+    """Localiza la fila de la hoja 'estado' de un objetivo por su entrada y su índice"""
+    celdas = hoja.findall(str(id_entrada), in_column=1)
+    celdas.sort(key=lambda celda: celda.row)
+    if celdas:
+        rangos = hoja.batch_get([f"{LETRA_COLUMNA_INDICE}{celda.row}" for celda in celdas])
+        for posicion, (celda, rango) in enumerate(zip(celdas, rangos)):
+            valor = rango[0][0] if rango and rango[0] else ""
+            if _indice_guardado(valor, posicion) == str(indice):
+                return celda.row
+    raise Exception(f"No existe el objetivo {indice} de la entrada {id_entrada}")
+
+def cambiar_estado_objetivo(id_entrada, indice, nuevo_estado, usuario=""):
+    """Cambia el estado de un objetivo y registra el cambio en el historial"""
+    try:
+        hoja = cargar_hoja_estado()
+        if hoja is None:
+            return False
         
-        # Limpiar y procesar datos
-        if not df.empty:
-            # Eliminar filas completamente vacías
-            df = df.dropna(how='all')
-            
-            # Limpiar espacios en blanco
-            string_columns = ['area', 'agrupacion', 'objetivo', 'indicador', 'responsable', 'estado']
-            for col in string_columns:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).str.strip()
-            
-            # Filtrar filas con datos válidos
-            df = df[
-                (df['objetivo'].notna()) & 
-                (df['objetivo'] != '') & 
-                (df['objetivo'] != 'nan')
-            ]
-            
-            # Ordenar por timestamp (más recientes primero)
-            if 'timestamp' in df.columns:
-                df = df.sort_values('timestamp', ascending=False)
+        fila = _fila_objetivo(hoja, id_entrada, indice)
+        estado_anterior = (hoja.get(f"H{fila}") or [[""]])[0][0]
+        timestamp = _ahora()
+        hoja.update([[str(nuevo_estado), timestamp]], f"H{fila}:I{fila}")
+        invalidar_cache_objetivos()
+        registrar_evento(EVENTO_CAMBIO_ESTADO, id_entrada, indice, {
+            "estado_anterior": estado_anterior,
+            "estado": str(nuevo_estado),
+        }, usuario=usuario, timestamp=timestamp)
+        return True
+    except Exception as e:
+        _error(f"No se pudo cambiar el estado del objetivo: {e}")
+        return False
+
+def editar_objetivo(id_entrada, indice, cambios, usuario=""):
+    """Modifica campos de un objetivo y registra la edición en el historial"""
+    try:
+        cambios = {col: str(valor).strip() for col, valor in cambios.items() if col in CAMPOS_EDITABLES}
+        if not cambios:
+            return False
         
-        return df
+        hoja = cargar_hoja_estado()
+        if hoja is None:
+            return False
         
+        from gspread.utils import rowcol_to_a1
+        
+        fila = _fila_objetivo(hoja, id_entrada, indice)
+        encabezados = hoja.row_values(1)
+        hoja.batch_update([
+            {"range": rowcol_to_a1(fila, encabezados.index(col) + 1), "values": [[valor]]}
+            for col, valor in cambios.items()
+        ])
+        invalidar_cache_objetivos()
+        registrar_evento(EVENTO_EDITADO, id_entrada, indice, cambios, usuario=usuario)
+        return True
     except Exception as e:
-        st.error(f"Error cargando objetivos: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        _error(f"No se pudo editar el objetivo: {e}")
+        return False
+
+# ENVÍOS: IDENTIFICADORES DE ENTRADA Y SUPRESIÓN DE DUPLICADOS
+
+def cargar_hoja_envios():
+    """Carga la hoja 'envios' con los tokens y huellas de los envíos aceptados"""
+    return _cargar_o_crear_hoja("envios", COLUMNAS_ENVIOS)
+
+@st.cache_resource
+def obtener_registro_envios():
+    """Devuelve el registro en memoria de envíos aceptados, compartido por todas las sesiones"""
+    return RegistroEnvios()
+
+def _actualizar_registro_envios(hoja, registro):
+    """Incorpora al registro solo las filas de envíos añadidas desde la última lectura
+    (p. ej. por otras réplicas); no vuelve a leer la hoja entera"""
+    desde = registro.filas_leidas
+    filas = hoja.get(f"A{desde + 2}:D")
+    registro.incorporar(list(filas), desde)
+
+def reservar_envio(token, area, agrupacion, objetivos):
+    """Reserva un envío y le asigna un id_entrada nuevo.
+    
+    Devuelve (id_entrada, huella), o (None, huella) si el mismo token o el mismo
+    contenido se enviaron hace menos de envios.VENTANA_DUPLICADOS segundos (doble
+    clic, reintento de red...).
+    """
+    huella = huella_envio(area, agrupacion, objetivos)
+    registro = obtener_registro_envios()
+    
+    hoja = cargar_hoja_envios()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de envíos")
+    _actualizar_registro_envios(hoja, registro)
+    
+    if not registro.reservar(token, huella):
+        return None, huella
+    # uuid4 completo (128 bits): sin colisiones en la práctica
+    return uuid.uuid4().hex, huella
+
+def confirmar_envio(token, huella, id_entrada, timestamp, area, agrupacion, objetivos_guardados):
+    """Persiste un envío aceptado para que no se repita, incluso tras reiniciar.
+    
+    Solo se registra el contenido que se llegó a guardar: si el envío fue
+    parcial, los objetivos que fallaron se pueden reenviar después.
+    """
+    huella_guardada = huella_envio(area, agrupacion, objetivos_guardados)
+    if huella_guardada != huella:
+        obtener_registro_envios().confirmar(huella, huella_guardada)
+    
+    hoja = cargar_hoja_envios()
+    if hoja is None:
+        raise Exception("No se pudo conectar con la hoja de envíos")
+    hoja.append_row(
+        [str(token), str(huella_guardada), str(id_entrada), str(timestamp)],
+        value_input_option="RAW"
+    )
+
+def liberar_envio(token, huella):
+    """Anula la reserva de un envío que no se llegó a guardar, para poder reintentarlo"""
+    obtener_registro_envios().liberar(token, huella)
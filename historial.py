@@ -0,0 +1,110 @@
+import json
+import threading
+
+import pandas as pd
+
+# Tipos de evento del registro de auditoría
+EVENTO_CREADO = "creado"
+EVENTO_EDITADO = "editado"
+EVENTO_CAMBIO_ESTADO = "cambio_estado"
+
+COLUMNAS_EVENTOS = ["id_evento", "timestamp", "tipo", "id_entrada", "indice", "usuario", "datos"]
+
+COLUMNAS_SNAPSHOT = [
+    "id_entrada", "indice", "timestamp", "area", "agrupacion",
+    "objetivo", "indicador", "responsable", "estado", "fecha_cambio_estado"
+]
+
+# Campos de un objetivo que se pueden modificar con un evento 'editado'
+CAMPOS_EDITABLES = ["area", "agrupacion", "objetivo", "indicador", "responsable"]
+
+def fila_a_evento(fila):
+    """Convierte una fila de la hoja de eventos en un diccionario"""
+    fila = list(fila) + [""] * (len(COLUMNAS_EVENTOS) - len(fila))
+    evento = dict(zip(COLUMNAS_EVENTOS, fila))
+    try:
+        evento["datos"] = json.loads(evento["datos"]) if evento["datos"] else {}
+    except ValueError:
+        evento["datos"] = {}
+    return evento
+
+def evento_a_fila(id_evento, timestamp, tipo, id_entrada, indice, usuario, datos):
+    """Convierte un evento en una fila para la hoja de eventos"""
+    return [
+        str(id_evento), str(timestamp), str(tipo), str(id_entrada),
+        str(indice), str(usuario), json.dumps(datos, ensure_ascii=False)
+    ]
+
+def aplicar_eventos(estado, eventos):
+    """Aplica una secuencia de eventos sobre el estado actual.
+
+    `estado` es un diccionario (id_entrada, indice) -> datos del objetivo y se
+    modifica en el sitio. Aplicar dos veces el mismo evento da el mismo
+    resultado, así que no pasa nada si una compactación interrumpida hace que
+    se vuelvan a aplicar eventos ya incluidos en el snapshot.
+    """
+    for evento in eventos:
+        clave = (str(evento["id_entrada"]), str(evento["indice"]))
+        datos = evento["datos"]
+        if evento["tipo"] == EVENTO_CREADO:
+            estado[clave] = {
+                **{col: "" for col in COLUMNAS_SNAPSHOT},
+                **{col: str(valor) for col, valor in datos.items() if col in COLUMNAS_SNAPSHOT},
+                "id_entrada": clave[0],
+                "indice": clave[1],
+            }
+        elif clave in estado and evento["tipo"] == EVENTO_EDITADO:
+            for col, valor in datos.items():
+                if col in CAMPOS_EDITABLES:
+                    estado[clave][col] = str(valor)
+        elif clave in estado and evento["tipo"] == EVENTO_CAMBIO_ESTADO:
+            estado[clave]["estado"] = str(datos.get("estado", estado[clave]["estado"]))
+            estado[clave]["fecha_cambio_estado"] = str(evento["timestamp"])
+    return estado
+
+def estado_desde_filas(filas):
+    """Construye el estado a partir de las filas de un snapshot (sin encabezados)"""
+    estado = {}
+    for fila in filas:
+        fila = list(fila) + [""] * (len(COLUMNAS_SNAPSHOT) - len(fila))
+        datos = dict(zip(COLUMNAS_SNAPSHOT, (str(valor) for valor in fila)))
+        estado[(datos["id_entrada"], datos["indice"])] = datos
+    return estado
+
+def estado_a_filas(estado):
+    """Convierte el estado en filas para escribir un snapshot"""
+    return [[datos[col] for col in COLUMNAS_SNAPSHOT] for datos in estado.values()]
+
+def estado_a_dataframe(estado):
+    """Convierte el estado en un DataFrame con las columnas del snapshot"""
+    return pd.DataFrame(estado_a_filas(estado), columns=COLUMNAS_SNAPSHOT)
+
+class IndiceEventos:
+    """Índice en memoria id_entrada -> filas de la hoja de eventos.
+
+    Se amplía de forma incremental leyendo solo las filas añadidas desde la
+    última actualización, de modo que consultar el historial de una entrada
+    no obliga a recorrer toda la hoja.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filas_por_entrada = {}
+        self.filas_indexadas = 0
+
+    def ampliar(self, ids_entrada, desde):
+        """Añade al índice los id_entrada de las filas leídas a partir de la fila `desde`, en orden de la hoja.
+
+        Si otra sesión ya indexó parte de esas filas, solo se añaden las restantes.
+        """
+        ids_entrada = list(ids_entrada)
+        with self._lock:
+            for id_entrada in ids_entrada[max(self.filas_indexadas - desde, 0):]:
+                self.filas_indexadas += 1
+                # La fila 1 de la hoja son los encabezados
+                self._filas_por_entrada.setdefault(str(id_entrada), []).append(self.filas_indexadas + 1)
+
+    def filas(self, id_entrada):
+        """Devuelve los números de fila (de la hoja) de los eventos de una entrada"""
+        with self._lock:
+            return list(self._filas_por_entrada.get(str(id_entrada), []))
@@ -0,0 +1,173 @@
+"""Generación de informes de objetivos por área / responsable desde la línea de comandos.
+
+No necesita la aplicación Streamlit: reutiliza gsheets_service con las
+credenciales de un fichero o de variables de entorno. Ejemplo para cron:
+
+    python informes_cli.py --credenciales cuenta_servicio.json --sheet-id <ID> \\
+        --salida /srv/informes --por area responsable --formato excel --procesos 4
+
+La hoja 'estado' se lee por bloques de filas y cada bloque se reparte en
+ficheros temporales por grupo, de modo que la memoria usada depende del
+tamaño del bloque y no del de la hoja. Después cada informe se genera en
+un proceso independiente.
+"""
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+logger = logging.getLogger("formulario_objetivos.informes")
+
+DIMENSIONES = ["area", "responsable"]
+FORMATOS = {"excel": ".xlsx", "parquet": ".parquet"}
+
+def _nombre_fichero(valor):
+    """Convierte un valor (área, responsable) en un nombre de fichero seguro y único.
+
+    Al sustituir los caracteres no válidos, valores distintos pueden quedar
+    igual ("I+D" e "I-D", o solo mayúsculas en sistemas que no las distinguen):
+    se añade un resumen corto del valor original para que no se sobrescriban.
+    """
+    valor = str(valor).strip()
+    nombre = re.sub(r"[^\w\-]+", "_", valor, flags=re.UNICODE).strip("_")
+    resumen = hashlib.sha1(valor.encode("utf-8")).hexdigest()[:8]
+    return f"{nombre or 'sin_valor'}_{resumen}"
+
+def leer_por_bloques(hoja, encabezados, tam_bloque):
+    """Itera sobre las filas de datos de la hoja en bloques de `tam_bloque` filas.
+
+    Sheets omite las filas vacías al final de cada rango, así que un bloque
+    corto o vacío no indica el final de los datos: se recorre hasta `row_count`.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    ultima_columna = re.sub(r"\d", "", rowcol_to_a1(1, len(encabezados)))
+    total_filas = hoja.row_count
+    inicio = 2
+    while inicio <= total_filas:
+        fin = min(inicio + tam_bloque - 1, total_filas)
+        filas = hoja.get(f"A{inicio}:{ultima_columna}{fin}")
+        if filas:
+            yield [fila + [""] * (len(encabezados) - len(fila)) for fila in filas]
+        inicio = fin + 1
+
+def repartir_en_grupos(bloques, encabezados, dimensiones, directorio):
+    """Escribe cada fila en un CSV temporal por dimensión y valor; devuelve {(dimension, valor): ruta}"""
+    posiciones = {dim: encabezados.index(dim) for dim in dimensiones}
+    pos_objetivo = encabezados.index("objetivo")
+    rutas = {}
+    filas_leidas = 0
+
+    for bloque in bloques:
+        grupos = {}
+        for fila in bloque:
+            if not str(fila[pos_objetivo]).strip():
+                continue
+            filas_leidas += 1
+            for dim, pos in posiciones.items():
+                grupos.setdefault((dim, str(fila[pos]).strip()), []).append(fila)
+
+        for clave, filas in grupos.items():
+            ruta = rutas.get(clave)
+            if ruta is None:
+                ruta = os.path.join(directorio, f"{clave[0]}__{len(rutas)}.csv")
+                rutas[clave] = ruta
+                with open(ruta, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(encabezados)
+            with open(ruta, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(filas)
+
+    logger.info("Leídas %d filas de objetivos en %d grupos", filas_leidas, len(rutas))
+    return rutas
+
+def generar_informe(ruta_csv, destino, formato):
+    """Genera el informe de un grupo a partir de su CSV temporal (se ejecuta en un proceso aparte)"""
+    import pandas as pd
+
+    df = pd.read_csv(ruta_csv, dtype=str, keep_default_na=False)
+    if "timestamp" in df.columns:
+        df = df.sort_values("timestamp", ascending=False)
+
+    if formato == "parquet":
+        df.to_parquet(destino, index=False)
+    else:
+        with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+            df.to_excel(writer, index=False, sheet_name="Objetivos")
+    return destino, len(df)
+
+def ejecutar(args):
+    """Genera todos los informes; devuelve el número de informes fallidos"""
+    if args.credenciales:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = args.credenciales
+    if args.sheet_id:
+        os.environ["SHEET_ID"] = args.sheet_id
+
+    from gsheets_service import cargar_hoja_estado
+
+    hoja = cargar_hoja_estado()
+    if hoja is None:
+        logger.error("No se pudo conectar con la hoja de objetivos")
+        return 1
+
+    encabezados = hoja.row_values(1)
+    faltan = [col for col in ["objetivo"] + args.por if col not in encabezados]
+    if faltan:
+        logger.error("La hoja 'estado' no tiene las columnas: %s", ", ".join(faltan))
+        return 1
+
+    fecha = datetime.now().strftime("%Y%m%d")
+    extension = FORMATOS[args.formato]
+    fallidos = 0
+
+    with tempfile.TemporaryDirectory(prefix="informes_objetivos_") as directorio:
+        bloques = leer_por_bloques(hoja, encabezados, args.bloque)
+        rutas = repartir_en_grupos(bloques, encabezados, args.por, directorio)
+
+        with ProcessPoolExecutor(max_workers=args.procesos) as ejecutor:
+            futuros = {}
+            for (dimension, valor), ruta_csv in rutas.items():
+                carpeta = os.path.join(args.salida, dimension)
+                os.makedirs(carpeta, exist_ok=True)
+                destino = os.path.join(carpeta, f"objetivos_{_nombre_fichero(valor)}_{fecha}{extension}")
+                futuros[ejecutor.submit(generar_informe, ruta_csv, destino, args.formato)] = destino
+
+            for futuro in as_completed(futuros):
+                try:
+                    destino, filas = futuro.result()
+                    logger.info("Informe generado: %s (%d objetivos)", destino, filas)
+                except Exception as e:
+                    fallidos += 1
+                    logger.error("Error generando %s: %s", futuros[futuro], e)
+
+    return fallidos
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Genera informes de objetivos por área y/o responsable.")
+    parser.add_argument("--credenciales", help="Fichero JSON de la cuenta de servicio (o GOOGLE_APPLICATION_CREDENTIALS)")
+    parser.add_argument("--sheet-id", help="ID del Google Sheets (o variable SHEET_ID)")
+    parser.add_argument("--salida", default="informes", help="Directorio de salida (por defecto: informes)")
+    parser.add_argument("--por", nargs="+", choices=DIMENSIONES, default=["area"],
+                        help="Dimensiones por las que agrupar los informes")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default="excel", help="Formato de los informes")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo")
+    parser.add_argument("--bloque", type=int, default=5000, help="Filas leídas por petición a Sheets")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar más información")
+    return parser
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    fallidos = ejecutar(args)
+    return 1 if fallidos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
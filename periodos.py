@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Periodos predefinidos del filtro de fechas: etiqueta -> (frecuencia, desplazamiento)
+PERIODOS = {
+    "Mes actual": ("M", 0),
+    "Mes anterior": ("M", -1),
+    "Trimestre actual": ("Q", 0),
+    "Último trimestre": ("Q", -1),
+    "Año actual": ("Y", 0),
+    "Año anterior": ("Y", -1),
+}
+
+# Origen de los números de serie de fecha de Google Sheets (días desde esa fecha)
+ORIGEN_SERIAL = pd.Timestamp("1899-12-30")
+
+def convertir_fechas(valores):
+    """Convierte los timestamps de la hoja en datetime64 admitiendo formatos distintos por fila.
+
+    Se prueba primero ISO 8601 (con o sin hora, el formato que escribe la
+    aplicación); lo que no encaja se interpreta como número de serie de Sheets
+    (las celdas de tipo fecha leídas sin formato) o, en último caso, se analiza
+    fila a fila con día primero. Solo quedan NaT los valores que no son fechas.
+    """
+    texto = pd.Series(valores).astype(str).str.strip()
+    fechas = pd.to_datetime(texto, format="ISO8601", errors="coerce")
+
+    pendientes = fechas.isna() & (texto != "")
+    if pendientes.any():
+        serial = pd.to_numeric(texto[pendientes], errors="coerce").dropna()
+        if not serial.empty:
+            fechas[serial.index] = (ORIGEN_SERIAL + pd.to_timedelta(serial, unit="D")).dt.round("s")
+        pendientes &= fechas.isna()
+    if pendientes.any():
+        fechas[pendientes] = pd.to_datetime(texto[pendientes], format="mixed", dayfirst=True, errors="coerce")
+    return fechas
+
+def indexar_fechas(df):
+    """Añade la columna 'fecha' (timestamp ya convertido) y ordena por ella.
+
+    Las filas quedan de la más reciente a la más antigua, con las fechas no
+    válidas al final; es el orden que espera filtrar_por_fechas.
+    """
+    if df.empty or 'timestamp' not in df.columns:
+        return df
+    df = df.assign(fecha=convertir_fechas(df['timestamp']))
+    return df.sort_values('fecha', ascending=False, na_position='last', kind='stable')
+
+def rango_periodo(periodo, hoy=None):
+    """Devuelve el rango [desde, hasta) de un periodo predefinido de PERIODOS"""
+    frecuencia, desplazamiento = PERIODOS[periodo]
+    actual = pd.Period(hoy or pd.Timestamp.now(), freq=frecuencia) + desplazamiento
+    return actual.start_time, (actual + 1).start_time
+
+def filtrar_por_fechas(df, desde=None, hasta=None):
+    """Devuelve las filas con desde <= fecha < hasta mediante búsqueda binaria.
+
+    Requiere el orden de indexar_fechas. Al estar ordenadas, las filas del
+    rango son un bloque contiguo: solo se buscan sus límites (O(log n)) y se
+    recorta el DataFrame sin recorrer las filas.
+    """
+    if df.empty or 'fecha' not in df.columns or (desde is None and hasta is None):
+        return df
+
+    # Orden descendente con NaT (el mínimo int64) al final: invertido es ascendente
+    ascendente = df['fecha'].to_numpy(dtype='datetime64[ns]').view('i8')[::-1]
+    n = len(ascendente)
+    if desde is not None:
+        inicio = np.searchsorted(ascendente, pd.Timestamp(desde).value, side='left')
+    else:
+        # Excluir igualmente las fechas no válidas (al principio del orden ascendente)
+        inicio = np.searchsorted(ascendente, np.iinfo('i8').min, side='right')
+    fin = np.searchsorted(ascendente, pd.Timestamp(hasta).value, side='left') if hasta is not None else n
+    return df.iloc[n - fin:n - inicio]
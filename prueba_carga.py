@@ -0,0 +1,460 @@
+"""Prueba de carga: simula sesiones concurrentes de la aplicación Streamlit.
+
+Cada usuario simulado abre la aplicación con el AppTest de Streamlit en su
+propio proceso (AppTest usa un Runtime global, así que no admite varias
+sesiones en el mismo proceso), rellena el formulario de objetivos
+(render_objetivos_form) y lo envía. Google Sheets se sustituye por un backend
+falso en memoria, compartido por todos los procesos a través de un gestor de
+multiprocessing, que cuenta las llamadas a la API y puede añadir una latencia
+fija por llamada.
+
+    python prueba_carga.py --usuarios 1 10 25 50 --objetivos 3 --latencia-api 0.05
+
+Para cada nivel de concurrencia se informa de la latencia de las ejecuciones
+del script (p50/p95/p99), las llamadas a la API por envío, los envíos
+descartados como duplicados y la tasa de error.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, namedtuple
+from multiprocessing.managers import BaseManager
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "formulario_objetivos.py")
+
+AREAS_EJEMPLO = [
+    ["ALCALDÍA - OMAC", "Alcaldía"],
+    ["RECURSOS HUMANOS", "Personal"],
+    ["HACIENDA", "Contabilidad"],
+    ["URBANISMO", "Licencias"],
+]
+
+# --- Backend falso de Google Sheets ---------------------------------------
+
+Celda = namedtuple("Celda", ["row", "col", "value"])
+
+class ContadorLlamadas:
+    """Cuenta las llamadas a la API falsa, por método"""
+
+    def __init__(self, latencia=0.0):
+        self._lock = threading.Lock()
+        self.latencia = latencia
+        self.llamadas = Counter()
+
+    def registrar(self, metodo):
+        with self._lock:
+            self.llamadas[metodo] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def total(self):
+        with self._lock:
+            return sum(self.llamadas.values())
+
+    def copia(self):
+        with self._lock:
+            return Counter(self.llamadas)
+
+def _columna_a_indice(letras):
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (ord(letra) - ord("A") + 1)
+    return indice - 1
+
+def _parsear_rango(rango):
+    """Convierte 'A2:G', 'D5:D', 'H3' o 'A1' en (fila_ini, fila_fin, col_ini, col_fin), base 0"""
+    rango = rango.split("!")[-1]
+    m = re.fullmatch(r"([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?", rango)
+    if not m:
+        raise ValueError(f"Rango no soportado: {rango}")
+    col_ini = _columna_a_indice(m.group(1))
+    fila_ini = int(m.group(2)) - 1 if m.group(2) else 0
+    if m.group(3):
+        col_fin = _columna_a_indice(m.group(3))
+        fila_fin = int(m.group(4)) - 1 if m.group(4) else None
+    else:
+        col_fin = col_ini
+        fila_fin = fila_ini if m.group(2) else None
+    return fila_ini, fila_fin, col_ini, col_fin
+
+class HojaFalsa:
+    """Worksheet en memoria con el subconjunto de la API de gspread que usa la aplicación"""
+
+    def __init__(self, titulo, contador):
+        self.title = titulo
+        self._contador = contador
+        self._lock = threading.Lock()
+        self._filas = []
+
+    @property
+    def row_count(self):
+        with self._lock:
+            return len(self._filas)
+
+    def _leer(self, rango):
+        fila_ini, fila_fin, col_ini, col_fin = _parsear_rango(rango)
+        filas = self._filas[fila_ini:None if fila_fin is None else fila_fin + 1]
+        resultado = [fila[col_ini:col_fin + 1] for fila in filas]
+        while resultado and not any(resultado[-1]):
+            resultado.pop()
+        return [list(fila) for fila in resultado]
+
+    def append_row(self, valores, **kwargs):
+        self._contador.registrar("append_row")
+        with self._lock:
+            self._filas.append([str(v) for v in valores])
+            fila = len(self._filas)
+        return {"updates": {"updatedRange": f"{self.title}!A{fila}"}}
+
+    def append_rows(self, filas, **kwargs):
+        self._contador.registrar("append_rows")
+        with self._lock:
+            self._filas.extend([str(v) for v in fila] for fila in filas)
+
+    def get_all_values(self, **kwargs):
+        self._contador.registrar("get_all_values")
+        with self._lock:
+            return [list(fila) for fila in self._filas]
+
+    def get_all_records(self, **kwargs):
+        self._contador.registrar("get_all_records")
+        with self._lock:
+            if not self._filas:
+                return []
+            encabezados = self._filas[0]
+            return [dict(zip(encabezados, fila)) for fila in self._filas[1:]]
+
+    def row_values(self, fila, **kwargs):
+        self._contador.registrar("row_values")
+        with self._lock:
+            return list(self._filas[fila - 1]) if fila <= len(self._filas) else []
+
+    def col_values(self, col, **kwargs):
+        self._contador.registrar("col_values")
+        with self._lock:
+            valores = [fila[col - 1] if col <= len(fila) else "" for fila in self._filas]
+        while valores and not valores[-1]:
+            valores.pop()
+        return valores
+
+    def get(self, rango=None, **kwargs):
+        self._contador.registrar("get")
+        with self._lock:
+            return self._leer(rango or "A1:Z")
+
+    def batch_get(self, rangos, major_dimension="ROWS", **kwargs):
+        self._contador.registrar("batch_get")
+        with self._lock:
+            resultados = [self._leer(rango) for rango in rangos]
+        if major_dimension == "COLUMNS":
+            resultados = [self._trasponer(filas) for filas in resultados]
+        return resultados
+
+    @staticmethod
+    def _trasponer(filas):
+        ancho = max((len(fila) for fila in filas), default=0)
+        columnas = [[fila[j] if j < len(fila) else "" for fila in filas] for j in range(ancho)]
+        for columna in columnas:
+            while columna and not columna[-1]:
+                columna.pop()
+        return columnas
+
+    def findall(self, consulta, in_column=None, **kwargs):
+        self._contador.registrar("findall")
+        with self._lock:
+            return [
+                Celda(i + 1, j + 1, valor)
+                for i, fila in enumerate(self._filas)
+                for j, valor in enumerate(fila)
+                if valor == consulta and (in_column is None or j + 1 == in_column)
+            ]
+
+    def update(self, valores, rango="A1", **kwargs):
+        self._contador.registrar("update")
+        with self._lock:
+            self._escribir(rango, valores)
+
+    def batch_update(self, datos, **kwargs):
+        self._contador.registrar("batch_update")
+        with self._lock:
+            for dato in datos:
+                self._escribir(dato["range"], dato["values"])
+
+    def _escribir(self, rango, valores):
+        fila_ini, _, col_ini, _ = _parsear_rango(rango)
+        for i, fila_valores in enumerate(valores):
+            while len(self._filas) <= fila_ini + i:
+                self._filas.append([])
+            fila = self._filas[fila_ini + i]
+            while len(fila) < col_ini + len(fila_valores):
+                fila.append("")
+            for j, valor in enumerate(fila_valores):
+                fila[col_ini + j] = str(valor)
+
+    def clear(self, **kwargs):
+        self._contador.registrar("clear")
+        with self._lock:
+            self._filas = []
+
+class HojaCalculoFalsa:
+    def __init__(self, contador):
+        self._contador = contador
+        self._lock = threading.Lock()
+        self._hojas = {}
+        areas = HojaFalsa("Areas_Agrupaciones", contador)
+        areas._filas = [["Area", "Agrupacion_Funcional"]] + [list(fila) for fila in AREAS_EJEMPLO]
+        self._hojas[areas.title] = areas
+
+    def worksheet(self, titulo):
+        import gspread
+
+        self._contador.registrar("worksheet")
+        with self._lock:
+            if titulo not in self._hojas:
+                raise gspread.WorksheetNotFound(titulo)
+            return self._hojas[titulo]
+
+    def add_worksheet(self, title, rows=None, cols=None, **kwargs):
+        self._contador.registrar("add_worksheet")
+        with self._lock:
+            return self._hojas.setdefault(title, HojaFalsa(title, self._contador))
+
+class ClienteFalso:
+    def __init__(self, contador):
+        self._contador = contador
+        self._hoja_calculo = HojaCalculoFalsa(contador)
+
+    def open_by_key(self, clave):
+        self._contador.registrar("open_by_key")
+        return self._hoja_calculo
+
+def instalar_backend_falso(latencia=0.0):
+    """Sustituye el cliente de Google Sheets de gsheets_service por el backend falso"""
+    import gsheets_service
+
+    os.environ.setdefault("SHEET_ID", "hoja-de-prueba")
+    contador = ContadorLlamadas(latencia)
+    cliente = ClienteFalso(contador)
+    gsheets_service.inicializar_cliente = lambda: cliente
+    return contador
+
+# --- Backend falso compartido entre procesos -------------------------------
+
+class BackendFalso:
+    """Backend falso completo; vive en el proceso del gestor y lo usan todas las sesiones"""
+
+    def __init__(self, latencia=0.0):
+        self._contador = ContadorLlamadas(latencia)
+        self._cliente = ClienteFalso(self._contador)
+
+    def registrar(self, metodo):
+        self._contador.registrar(metodo)
+
+    def abrir_hoja(self, titulo):
+        return self._cliente._hoja_calculo.worksheet(titulo).title
+
+    def crear_hoja(self, titulo):
+        return self._cliente._hoja_calculo.add_worksheet(titulo).title
+
+    def llamar(self, titulo, metodo, args, kwargs):
+        hoja = self._cliente._hoja_calculo._hojas[titulo]
+        return getattr(hoja, metodo)(*args, **kwargs)
+
+    def atributo(self, titulo, nombre):
+        return getattr(self._cliente._hoja_calculo._hojas[titulo], nombre)
+
+    def llamadas(self):
+        return self._contador.copia()
+
+class GestorBackend(BaseManager):
+    pass
+
+GestorBackend.register("BackendFalso", BackendFalso)
+
+class HojaRemota:
+    """Worksheet que reenvía cada llamada al BackendFalso del gestor"""
+
+    def __init__(self, backend, titulo):
+        self._backend = backend
+        self.title = titulo
+
+    @property
+    def row_count(self):
+        return self._backend.atributo(self.title, "row_count")
+
+    def __getattr__(self, metodo):
+        if metodo.startswith("_"):
+            raise AttributeError(metodo)
+        return lambda *args, **kwargs: self._backend.llamar(self.title, metodo, args, kwargs)
+
+class HojaCalculoRemota:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def worksheet(self, titulo):
+        return HojaRemota(self._backend, self._backend.abrir_hoja(titulo))
+
+    def add_worksheet(self, title, rows=None, cols=None, **kwargs):
+        return HojaRemota(self._backend, self._backend.crear_hoja(title))
+
+class ClienteRemoto:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def open_by_key(self, clave):
+        self._backend.registrar("open_by_key")
+        return HojaCalculoRemota(self._backend)
+
+def instalar_backend_remoto(backend):
+    """Sustituye el cliente de Google Sheets de gsheets_service por un proxy al backend compartido"""
+    import gsheets_service
+
+    os.environ.setdefault("SHEET_ID", "hoja-de-prueba")
+    cliente = ClienteRemoto(backend)
+    gsheets_service.inicializar_cliente = lambda: cliente
+
+# --- Usuarios simulados ---------------------------------------------------
+
+Resultado = namedtuple("Resultado", ["latencias", "enviado", "duplicado", "error"])
+
+# Aviso de la aplicación cuando un envío repite uno anterior y no se guarda
+AVISO_DUPLICADO = "ya se habían enviado"
+
+def _boton(at, etiqueta):
+    return next(boton for boton in at.button if boton.label == etiqueta)
+
+def _ejecutar(at, latencias, accion=None):
+    inicio = time.perf_counter()
+    if accion is None:
+        at.run()
+    else:
+        accion().run()
+    latencias.append(time.perf_counter() - inicio)
+
+def simular_usuario(n_usuario, n_objetivos, timeout):
+    """Abre la aplicación, rellena n_objetivos objetivos y los envía.
+
+    El contenido lleva un identificador propio de la sesión simulada: si no,
+    los usuarios de niveles posteriores repetirían envíos anteriores y la
+    aplicación los descartaría como duplicados sin escribir nada.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    latencias = []
+    sesion = uuid.uuid4().hex[:8]
+    try:
+        at = AppTest.from_file(RUTA_APP, default_timeout=timeout)
+        _ejecutar(at, latencias)
+
+        for i in range(n_objetivos):
+            if i > 0:
+                _ejecutar(at, latencias, lambda: _boton(at, "➕ Nuevo objetivo").click())
+            at.text_area(key=f"obj_{i}").input(f"Objetivo {i + 1} del usuario {n_usuario} ({sesion})")
+            at.text_input(key=f"ind_{i}").input(f"Indicador {i + 1}")
+            at.text_input(key=f"resp_{i}").input(f"Responsable {n_usuario}")
+
+        _ejecutar(at, latencias, lambda: _boton(at, "🚀 Enviar objetivos").click())
+
+        error = bool(at.exception) or bool(at.error)
+        duplicado = not error and any(AVISO_DUPLICADO in aviso.value for aviso in at.info)
+        return Resultado(latencias, not (error or duplicado), duplicado, error)
+    except Exception:
+        return Resultado(latencias, False, False, True)
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+def _sesion(backend, barrera, n_usuario, n_objetivos, timeout, resultados):
+    """Proceso de un usuario simulado: espera a los demás y publica su Resultado"""
+    instalar_backend_remoto(backend)
+    # Importar la aplicación antes de la barrera: el arranque no cuenta como latencia
+    from streamlit.testing.v1 import AppTest  # noqa: F401
+
+    try:
+        barrera.wait(timeout=timeout)
+    except threading.BrokenBarrierError:
+        pass
+    resultados.put(simular_usuario(n_usuario, n_objetivos, timeout))
+
+def ejecutar_nivel(backend, usuarios, n_objetivos, timeout):
+    """Ejecuta `usuarios` sesiones concurrentes, una por proceso, y devuelve las métricas del nivel"""
+    llamadas_antes = backend.llamadas()
+    barrera = multiprocessing.Barrier(usuarios)
+    cola = multiprocessing.Queue()
+    procesos = [
+        multiprocessing.Process(target=_sesion, args=(backend, barrera, n, n_objetivos, timeout, cola))
+        for n in range(usuarios)
+    ]
+    inicio = time.perf_counter()
+    for proceso in procesos:
+        proceso.start()
+
+    resultados = []
+    limite = time.monotonic() + timeout * (n_objetivos + 3)
+    for _ in procesos:
+        try:
+            resultados.append(cola.get(timeout=max(limite - time.monotonic(), 0)))
+        except queue.Empty:
+            # El proceso terminó sin publicar resultado o se agotó el tiempo
+            resultados.append(Resultado([], False, False, True))
+    for proceso in procesos:
+        proceso.join(timeout=1)
+        if proceso.is_alive():
+            proceso.terminate()
+    duracion = time.perf_counter() - inicio
+    llamadas = backend.llamadas()
+    llamadas.subtract(llamadas_antes)
+
+    # Las latencias de las sesiones fallidas no son representativas
+    latencias = [lat for resultado in resultados if not resultado.error for lat in resultado.latencias]
+    envios = sum(resultado.enviado for resultado in resultados)
+    duplicados = sum(resultado.duplicado for resultado in resultados)
+    errores = sum(resultado.error for resultado in resultados)
+    return {
+        "usuarios": usuarios,
+        "duracion": duracion,
+        "p50": _percentil(latencias, 50),
+        "p95": _percentil(latencias, 95),
+        "p99": _percentil(latencias, 99),
+        "llamadas_por_envio": sum(llamadas.values()) / envios if envios else 0.0,
+        "escrituras_por_envio": (llamadas["append_row"] + llamadas["append_rows"]) / envios if envios else 0.0,
+        "duplicados": duplicados,
+        "tasa_error": errores / usuarios,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones Streamlit simuladas.")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[1, 10, 25, 50],
+                        help="Niveles de concurrencia a probar")
+    parser.add_argument("--objetivos", type=int, default=3, help="Objetivos que rellena cada usuario")
+    parser.add_argument("--latencia-api", type=float, default=0.0,
+                        help="Segundos de latencia simulada por llamada a la API de Sheets")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Tiempo máximo por ejecución del script")
+    args = parser.parse_args(argv)
+
+    with GestorBackend() as gestor:
+        backend = gestor.BackendFalso(args.latencia_api)
+
+        print(f"{'usuarios':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} "
+              f"{'API/envío':>10} {'escr./envío':>11} {'dupl.':>6} {'error':>6} {'total (s)':>9}")
+        for usuarios in args.usuarios:
+            m = ejecutar_nivel(backend, usuarios, args.objetivos, args.timeout)
+            print(f"{m['usuarios']:>8} {m['p50']:>8.3f} {m['p95']:>8.3f} {m['p99']:>8.3f} "
+                  f"{m['llamadas_por_envio']:>10.1f} {m['escrituras_por_envio']:>11.1f} "
+                  f"{m['duplicados']:>6} {m['tasa_error']:>6.1%} {m['duracion']:>9.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
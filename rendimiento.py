@@ -0,0 +1,51 @@
+import logging
+import threading
+import time
+
+# Este módulo se importa una sola vez por proceso: marca el arranque
+INICIO_PROCESO = time.perf_counter()
+
+logger = logging.getLogger("formulario_objetivos.rendimiento")
+
+_lock = threading.Lock()
+_estadisticas = {
+    "primer_pintado": None,
+    "ejecuciones": 0,
+    "ultima_ejecucion": None,
+    "tiempo_total": 0.0,
+    "tiempo_maximo": 0.0,
+}
+
+def marcar_inicio():
+    """Devuelve la marca de tiempo de inicio de una ejecución del script"""
+    return time.perf_counter()
+
+def registrar_ejecucion(inicio):
+    """Registra la duración de una ejecución del script.
+
+    La primera ejecución del proceso se registra además como tiempo hasta el
+    primer pintado, medido desde la importación de este módulo.
+    """
+    fin = time.perf_counter()
+    duracion = fin - inicio
+    with _lock:
+        _estadisticas["ejecuciones"] += 1
+        _estadisticas["ultima_ejecucion"] = duracion
+        _estadisticas["tiempo_total"] += duracion
+        _estadisticas["tiempo_maximo"] = max(_estadisticas["tiempo_maximo"], duracion)
+        primera = _estadisticas["primer_pintado"] is None
+        if primera:
+            _estadisticas["primer_pintado"] = fin - INICIO_PROCESO
+
+    if primera:
+        logger.info("Primer pintado en %.3f s (ejecución: %.3f s)", fin - INICIO_PROCESO, duracion)
+    else:
+        logger.debug("Ejecución del script en %.3f s", duracion)
+
+def obtener_estadisticas():
+    """Devuelve una copia de las estadísticas de arranque y ejecución"""
+    with _lock:
+        estadisticas = dict(_estadisticas)
+    ejecuciones = estadisticas["ejecuciones"]
+    estadisticas["tiempo_medio"] = estadisticas["tiempo_total"] / ejecuciones if ejecuciones else 0.0
+    return estadisticas
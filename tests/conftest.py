@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+@pytest.fixture
+def backend_falso(tmp_path, monkeypatch):
+    """Google Sheets en memoria, con cachés y borradores en un directorio temporal"""
+    import streamlit as st
+    from prueba_carga import instalar_backend_falso
+
+    monkeypatch.setenv("OBJETIVOS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("BORRADORES_DB", str(tmp_path / "borradores.sqlite3"))
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    contador = instalar_backend_falso()
+    yield contador
+    st.cache_resource.clear()
+    st.cache_data.clear()
@@ -0,0 +1,57 @@
+import pandas as pd
+
+from agregados import AgregadosObjetivos
+
+FILAS = [
+    ("HACIENDA", "Contabilidad", "ACTIVO", "Ana", "2025-01-10 09:00:00"),
+    ("HACIENDA", "Contabilidad", "PAUSADO", "Luis", "2025-01-12 09:00:00"),
+    ("URBANISMO", "Licencias", "ACTIVO", "Ana", "2025-02-03 09:00:00"),
+]
+
+def _df(filas):
+    return pd.DataFrame(filas, columns=["area", "agrupacion", "estado", "responsable", "timestamp"])
+
+def _conteos(agregados):
+    tabla = agregados.como_dataframe()
+    return {tuple(fila[:-1]): fila[-1] for fila in tabla.itertuples(index=False)}
+
+def _assert_igual_a_reconstruir(agregados, filas):
+    esperado = AgregadosObjetivos.desde_dataframe(_df(filas))
+    assert _conteos(agregados) == _conteos(esperado)
+    assert agregados.total == len(filas)
+    assert agregados.n_areas == esperado.n_areas
+    assert agregados.n_responsables == esperado.n_responsables
+
+def test_filas_nuevas_se_suman():
+    agregados = AgregadosObjetivos.desde_dataframe(_df(FILAS[:2]))
+    agregados.sincronizar(_df(FILAS), version=2)
+    _assert_igual_a_reconstruir(agregados, FILAS)
+
+def test_cambio_de_estado():
+    agregados = AgregadosObjetivos.desde_dataframe(_df(FILAS))
+    filas = list(FILAS)
+    filas[0] = ("HACIENDA", "Contabilidad", "FINALIZADO", "Ana", "2025-01-10 09:00:00")
+    agregados.sincronizar(_df(filas), version=2)
+    _assert_igual_a_reconstruir(agregados, filas)
+    assert agregados.contar_estado("ACTIVO") == 1
+    assert agregados.contar_estado("FINALIZADO") == 1
+
+def test_hoja_reordenada():
+    agregados = AgregadosObjetivos.desde_dataframe(_df(FILAS))
+    filas = [FILAS[2], FILAS[0], FILAS[1]]
+    agregados.sincronizar(_df(filas), version=2)
+    _assert_igual_a_reconstruir(agregados, filas)
+
+def test_edicion_de_area_agrupacion_y_responsable():
+    agregados = AgregadosObjetivos.desde_dataframe(_df(FILAS))
+    filas = list(FILAS)
+    filas[1] = ("URBANISMO", "Licencias", "PAUSADO", "Marta", "2025-01-12 09:00:00")
+    agregados.sincronizar(_df(filas), version=2)
+    _assert_igual_a_reconstruir(agregados, filas)
+    assert "Luis" not in agregados.como_dataframe()["responsable"].tolist()
+
+def test_misma_version_no_se_vuelve_a_sincronizar():
+    agregados = AgregadosObjetivos()
+    agregados.sincronizar(_df(FILAS), version=1)
+    agregados.sincronizar(_df(FILAS[:1]), version=1)
+    assert agregados.total == len(FILAS)
@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from borradores import AlmacenBorradores, ObjetivoBorrador
+
+def _ids_en_disco(ruta):
+    with sqlite3.connect(ruta) as conexion:
+        return sorted(fila[0] for fila in conexion.execute("SELECT id FROM borradores"))
+
+def test_volcar_guarda_y_elimina(tmp_path):
+    ruta = str(tmp_path / "borradores.sqlite3")
+    almacen = AlmacenBorradores(ruta)
+    almacen.programar("a", [ObjetivoBorrador("Objetivo", "Indicador", "Ana")])
+    almacen.programar("b", [ObjetivoBorrador("Otro")])
+    almacen.volcar()
+    assert _ids_en_disco(ruta) == ["a", "b"]
+
+    almacen.eliminar("b")
+    almacen.volcar()
+    assert _ids_en_disco(ruta) == ["a"]
+    assert almacen.cargar("a") == [ObjetivoBorrador("Objetivo", "Indicador", "Ana")]
+
+def test_sesiones_inactivas_se_olvidan(tmp_path):
+    almacen = AlmacenBorradores(str(tmp_path / "borradores.sqlite3"), inactividad=0.01)
+    almacen.programar("a", [ObjetivoBorrador("Objetivo")])
+    almacen.volcar()
+    assert "a" in almacen._ultimos
+
+    time.sleep(0.02)
+    almacen.volcar()
+    assert almacen._ultimos == {}
+
+def test_borradores_antiguos_se_purgan(tmp_path):
+    ruta = str(tmp_path / "borradores.sqlite3")
+    almacen = AlmacenBorradores(ruta, dias_retencion=1)
+    with sqlite3.connect(ruta) as conexion:
+        conexion.execute(
+            "INSERT INTO borradores (id, datos, actualizado) VALUES (?, ?, ?)",
+            ("viejo", "[]", time.time() - 2 * 86400)
+        )
+    almacen.programar("nuevo", [ObjetivoBorrador("Objetivo")])
+    almacen.volcar()
+    assert _ids_en_disco(ruta) == ["nuevo"]
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from cache_compartida import CacheColumnar, fcntl
+
+def _df():
+    return pd.DataFrame({"area": ["HACIENDA", "URBANISMO"], "fila": [0, 1]})
+
+class Cargador:
+    def __init__(self, df=None):
+        self.llamadas = 0
+        self._df = _df() if df is None else df
+
+    def __call__(self):
+        self.llamadas += 1
+        return self._df
+
+def test_reutiliza_la_version_vigente(tmp_path):
+    cache = CacheColumnar("prueba", str(tmp_path), ttl=60)
+    cargar = Cargador()
+    df, version = cache.obtener(cargar)
+    df2, version2 = cache.obtener(cargar)
+
+    assert cargar.llamadas == 1
+    assert version2 == version
+    assert df2["area"].tolist() == ["HACIENDA", "URBANISMO"]
+    # Las columnas de texto se quedan en Arrow, sin copia
+    assert isinstance(df2["area"].dtype, pd.ArrowDtype)
+
+def test_invalidar_fuerza_la_recarga(tmp_path):
+    cache = CacheColumnar("prueba", str(tmp_path), ttl=60)
+    _, version = cache.obtener(Cargador())
+
+    cache.invalidar()
+    cargar = Cargador(pd.DataFrame({"area": ["HACIENDA"], "fila": [0]}))
+    df, nueva = cache.obtener(cargar)
+
+    assert cargar.llamadas == 1
+    assert nueva != version
+    assert df["area"].tolist() == ["HACIENDA"]
+    # La versión anterior se borra del disco
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".arrow")]) == 1
+
+def test_otra_instancia_ve_la_invalidacion(tmp_path):
+    cache = CacheColumnar("prueba", str(tmp_path), ttl=60)
+    otra = CacheColumnar("prueba", str(tmp_path), ttl=60)
+    cache.obtener(Cargador())
+
+    otra.invalidar()
+    cargar = Cargador()
+    cache.obtener(cargar)
+    assert cargar.llamadas == 1
+
+@pytest.mark.skipif(fcntl is None, reason="sin cerrojo entre procesos en esta plataforma")
+def test_lector_usa_la_version_anterior_mientras_otro_refresca(tmp_path):
+    cache = CacheColumnar("prueba", str(tmp_path), ttl=60)
+    _, version = cache.obtener(Cargador())
+    cache.invalidar()
+
+    # Otro proceso tiene el cerrojo (flock es por descriptor: basta con abrirlo de nuevo)
+    with open(os.path.join(str(tmp_path), "prueba.lock"), "a") as cerrojo:
+        fcntl.flock(cerrojo, fcntl.LOCK_EX)
+        try:
+            cargar = Cargador()
+            df, leida = cache.obtener(cargar)
+        finally:
+            fcntl.flock(cerrojo, fcntl.LOCK_UN)
+
+    assert cargar.llamadas == 0
+    assert leida == version
+    assert len(df) == 2
+
+def _obtener_en_otro_proceso(directorio, barrera, cola):
+    def cargar():
+        # Anotar la carga y tardar, para que los demás procesos coincidan con ella
+        with open(os.path.join(directorio, "cargas.txt"), "a") as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.5)
+        return _df()
+
+    cache = CacheColumnar("prueba", directorio, ttl=60)
+    barrera.wait()
+    _, version = cache.obtener(cargar)
+    cola.put(version)
+
+@pytest.mark.skipif(fcntl is None, reason="sin cerrojo entre procesos en esta plataforma")
+def test_un_solo_proceso_descarga_cuando_coinciden_varios(tmp_path):
+    directorio = str(tmp_path)
+    n = 4
+    barrera = multiprocessing.Barrier(n)
+    cola = multiprocessing.Queue()
+    procesos = [
+        multiprocessing.Process(target=_obtener_en_otro_proceso, args=(directorio, barrera, cola))
+        for _ in range(n)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    versiones = [cola.get(timeout=60) for _ in procesos]
+    for proceso in procesos:
+        proceso.join(timeout=10)
+
+    with open(os.path.join(directorio, "cargas.txt")) as f:
+        assert len(f.read().split()) == 1
+    assert len(set(versiones)) == 1
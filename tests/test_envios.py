@@ -0,0 +1,54 @@
+import time
+
+from envios import RegistroEnvios, huella_envio
+
+OBJETIVOS = [("Reducir plazos", "Días de tramitación", "Ana")]
+
+def test_huella_ignora_orden_espacios_y_mayusculas():
+    otra = [("  reducir   PLAZOS ", "días de tramitación", "ana")]
+    assert huella_envio("HACIENDA", "Contabilidad", OBJETIVOS) == huella_envio("hacienda ", "contabilidad", otra)
+    assert huella_envio("HACIENDA", "Contabilidad", OBJETIVOS) != huella_envio("URBANISMO", "Contabilidad", OBJETIVOS)
+
+def test_reservar_rechaza_token_o_contenido_repetidos():
+    registro = RegistroEnvios()
+    assert registro.reservar("t1", "h1")
+    assert not registro.reservar("t1", "h2")
+    assert not registro.reservar("t2", "h1")
+    assert registro.reservar("t2", "h2")
+
+def test_contenido_repetido_fuera_de_la_ventana_se_acepta():
+    registro = RegistroEnvios(ventana=60)
+    ahora = time.time()
+    assert registro.reservar("t1", "h1", ahora=ahora)
+    assert not registro.reservar("t2", "h1", ahora=ahora + 30)
+    assert registro.reservar("t3", "h1", ahora=ahora + 61)
+
+def test_liberar_permite_reintentar():
+    registro = RegistroEnvios()
+    assert registro.reservar("t1", "h1")
+    registro.liberar("t1", "h1")
+    assert registro.reservar("t1", "h1")
+
+def test_confirmar_sustituye_la_huella_reservada():
+    registro = RegistroEnvios()
+    assert registro.reservar("t1", "completo")
+    # Solo se guardó parte del envío
+    registro.confirmar("completo", "parcial")
+    assert registro.reservar("t2", "completo")
+    assert not registro.reservar("t3", "parcial")
+
+def test_incorporar_solo_filas_nuevas_y_recientes():
+    registro = RegistroEnvios(ventana=600)
+    reciente = time.strftime("%Y-%m-%d %H:%M:%S")
+    filas = [
+        ["t1", "h1", "e1", "2020-01-01 10:00:00"],
+        ["t2", "h2", "e2", reciente],
+    ]
+    registro.incorporar(filas, 0)
+    # Otra sesión leyó desde la misma posición con una fila más
+    registro.incorporar(filas + [["t3", "h3", "e3", reciente]], 0)
+    assert registro.filas_leidas == 3
+
+    assert registro.reservar("t4", "h1")
+    assert not registro.reservar("t5", "h2")
+    assert not registro.reservar("t3", "h6")
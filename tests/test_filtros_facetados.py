@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from streamlit.testing.v1 import AppTest
+
+from prueba_carga import RUTA_APP
+
+OBJETIVOS = [
+    ("HACIENDA", "Contabilidad", "Ana"),
+    ("HACIENDA", "Contabilidad", "Luis"),
+    ("URBANISMO", "Licencias", "Ana"),
+    ("URBANISMO", "Licencias", "Marta"),
+]
+
+def _sembrar_objetivos():
+    from gsheets_service import guardar_objetivo
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for indice, (area, agrupacion, responsable) in enumerate(OBJETIVOS):
+        guardar_objetivo(
+            id_entrada=f"entrada-{indice}",
+            timestamp=timestamp,
+            area=area,
+            agrupacion=agrupacion,
+            objetivo=f"Objetivo {indice}",
+            indicador=f"Indicador {indice}",
+            responsable=responsable,
+            estado="ACTIVO",
+        )
+
+def test_filtros_conservan_la_seleccion_al_cambiar_otra_faceta(backend_falso):
+    _sembrar_objetivos()
+    at = AppTest.from_file(RUTA_APP, default_timeout=60).run()
+    assert not at.exception
+
+    at.selectbox(key="filtro_area").select("HACIENDA").run()
+    assert at.selectbox(key="filtro_area").value == "HACIENDA"
+    assert at.selectbox(key="filtro_responsable").options == ["Todos (2)", "Ana (1)", "Luis (1)"]
+
+    # Elegir responsable cambia los recuentos (y las etiquetas) del filtro de área
+    at.selectbox(key="filtro_responsable").select("Ana").run()
+    assert not at.exception
+    assert at.selectbox(key="filtro_area").value == "HACIENDA"
+    assert at.selectbox(key="filtro_responsable").value == "Ana"
+    assert at.selectbox(key="filtro_area").options == ["Todas (2)", "HACIENDA (1)", "URBANISMO (1)"]
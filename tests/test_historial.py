@@ -0,0 +1,93 @@
+from historial import IndiceEventos
+
+def test_ampliar_ignora_las_filas_ya_indexadas():
+    indice = IndiceEventos()
+    # Dos sesiones leen desde la misma posición; la segunda llega tarde
+    indice.ampliar(["a", "b"], 0)
+    indice.ampliar(["a", "b", "a"], 0)
+    assert indice.filas_indexadas == 3
+    assert indice.filas("a") == [2, 4]
+    assert indice.filas("b") == [3]
+
+def test_ampliar_continua_desde_la_posicion_leida():
+    indice = IndiceEventos()
+    indice.ampliar(["a"], 0)
+    indice.ampliar(["b", "a"], 1)
+    assert indice.filas("a") == [2, 4]
+    assert indice.filas("b") == [3]
+
+def _guardar(id_entrada, indice, responsable="Ana", usuario=""):
+    from gsheets_service import guardar_objetivo
+
+    guardar_objetivo(
+        id_entrada=id_entrada,
+        timestamp="2025-03-01 10:00:00",
+        area="HACIENDA",
+        agrupacion="Contabilidad",
+        objetivo=f"Objetivo {indice}",
+        indicador=f"Indicador {indice}",
+        responsable=responsable,
+        estado="ACTIVO",
+        indice=indice,
+        usuario=usuario,
+    )
+
+def test_estado_e_historial_se_reutilizan_hasta_una_escritura(backend_falso):
+    import gsheets_service
+
+    _guardar("e1", 0)
+    assert len(gsheets_service.cargar_estado_actual()) == 1
+    assert len(gsheets_service.cargar_historial("e1")) == 1
+
+    lecturas = backend_falso.total()
+    gsheets_service.cargar_estado_actual()
+    gsheets_service.cargar_historial("e1")
+    assert backend_falso.total() == lecturas
+
+    assert gsheets_service.cambiar_estado_objetivo("e1", 0, "PAUSADO", usuario="ana@ejemplo.es")
+    estado = gsheets_service.cargar_estado_actual()
+    assert estado.loc[estado["id_entrada"] == "e1", "estado"].tolist() == ["PAUSADO"]
+    eventos = gsheets_service.cargar_historial("e1")
+    assert eventos["usuario"].tolist() == ["", "ana@ejemplo.es"]
+
+def test_la_compactacion_no_toca_el_snapshot_vigente(backend_falso, monkeypatch):
+    import gsheets_service
+
+    _guardar("e1", 0)
+    gsheets_service.cargar_estado_actual()
+    assert gsheets_service._ultimo_snapshot() == (1, "snapshot")
+    vigente = gsheets_service.cargar_hoja_snapshot("snapshot").get_all_values()
+
+    monkeypatch.setattr(gsheets_service, "UMBRAL_COMPACTACION", 0)
+    _guardar("e2", 0, responsable="Luis")
+    estado = gsheets_service.cargar_estado_actual()
+
+    assert sorted(estado["id_entrada"]) == ["e1", "e2"]
+    assert gsheets_service._ultimo_snapshot() == (2, "snapshot_b")
+    assert gsheets_service.cargar_hoja_snapshot("snapshot").get_all_values() == vigente
+
+def test_el_evento_de_creacion_anota_el_usuario(backend_falso):
+    import gsheets_service
+
+    _guardar("e1", 0, usuario="luis@ejemplo.es")
+    assert gsheets_service.cargar_historial("e1")["usuario"].tolist() == ["luis@ejemplo.es"]
+
+def test_envio_parcial_conserva_los_indices_guardados(backend_falso):
+    import gsheets_service
+
+    # El objetivo 1 del envío no se llegó a guardar
+    _guardar("e1", 0)
+    _guardar("e1", 2, responsable="Luis")
+
+    estado = gsheets_service.cargar_estado_actual()
+    assert sorted(estado.loc[estado["id_entrada"] == "e1", "indice"]) == ["0", "2"]
+
+    assert gsheets_service.cambiar_estado_objetivo("e1", 2, "FINALIZADO")
+    assert not gsheets_service.cambiar_estado_objetivo("e1", 1, "FINALIZADO")
+    estado = gsheets_service.cargar_estado_actual().set_index("indice")
+    assert estado.loc["2", "responsable"] == "Luis"
+    assert estado.loc["2", "estado"] == "FINALIZADO"
+    assert estado.loc["0", "estado"] == "ACTIVO"
+
+    eventos = gsheets_service.cargar_historial("e1")
+    assert eventos.loc[eventos["indice"].astype(str) == "2", "tipo"].tolist() == ["creado", "cambio_estado"]
@@ -0,0 +1,25 @@
+from informes_cli import _nombre_fichero, leer_por_bloques
+from prueba_carga import ContadorLlamadas, HojaFalsa
+
+ENCABEZADOS = ["id_entrada", "area", "objetivo"]
+
+def _hoja(filas):
+    hoja = HojaFalsa("estado", ContadorLlamadas())
+    hoja._filas = [ENCABEZADOS] + [list(fila) for fila in filas]
+    return hoja
+
+def test_leer_por_bloques_sigue_tras_bloques_vacios():
+    filas = [["1", "HACIENDA", "Objetivo 1"]] + [["", "", ""]] * 4 + [["2", "URBANISMO", "Objetivo 2"]]
+    bloques = list(leer_por_bloques(_hoja(filas), ENCABEZADOS, tam_bloque=2))
+    leidas = [fila for bloque in bloques for fila in bloque if fila[0]]
+    assert [fila[0] for fila in leidas] == ["1", "2"]
+
+def test_leer_por_bloques_completa_las_columnas():
+    bloques = list(leer_por_bloques(_hoja([["1", "HACIENDA"]]), ENCABEZADOS, tam_bloque=10))
+    assert bloques == [[["1", "HACIENDA", ""]]]
+
+def test_nombre_fichero_distingue_valores_que_se_sanean_igual():
+    nombres = {_nombre_fichero(valor) for valor in ["I+D", "I-D", "I D", "i d", "I/D"]}
+    assert len(nombres) == 5
+    assert _nombre_fichero(" HACIENDA ") == _nombre_fichero("HACIENDA")
+    assert _nombre_fichero("HACIENDA").startswith("HACIENDA_")
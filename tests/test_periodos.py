@@ -0,0 +1,53 @@
+import pandas as pd
+
+from periodos import convertir_fechas, filtrar_por_fechas, indexar_fechas, rango_periodo
+
+def _df(timestamps):
+    return indexar_fechas(pd.DataFrame({"timestamp": timestamps, "n": range(len(timestamps))}))
+
+def test_convertir_fechas_con_formatos_mezclados():
+    fechas = convertir_fechas(pd.Series([
+        "2025-01-05 10:00:00",
+        "2025-01-06",
+        "45663.5",        # número de serie de Sheets: 2025-01-06 12:00
+        "07/01/2025",     # día primero
+        "",
+        "sin fecha",
+    ]))
+    assert fechas.tolist()[:4] == [
+        pd.Timestamp("2025-01-05 10:00:00"),
+        pd.Timestamp("2025-01-06"),
+        pd.Timestamp("2025-01-06 12:00:00"),
+        pd.Timestamp("2025-01-07"),
+    ]
+    assert fechas.iloc[4:].isna().all()
+
+def test_indexar_fechas_ordena_con_nat_al_final():
+    df = _df(["2025-01-05 10:00:00", "", "2025-03-01", "2025-01-06"])
+    assert df["n"].tolist() == [2, 3, 0, 1]
+
+def test_rango_periodo_en_limites_de_trimestre():
+    hoy = pd.Timestamp("2025-04-01")
+    assert rango_periodo("Trimestre actual", hoy) == (pd.Timestamp("2025-04-01"), pd.Timestamp("2025-07-01"))
+    assert rango_periodo("Último trimestre", hoy) == (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-04-01"))
+    hoy = pd.Timestamp("2025-03-31 23:59:59")
+    assert rango_periodo("Trimestre actual", hoy) == (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-04-01"))
+    assert rango_periodo("Mes anterior", pd.Timestamp("2025-01-15")) == (
+        pd.Timestamp("2024-12-01"), pd.Timestamp("2025-01-01")
+    )
+
+def test_filtrar_por_fechas_excluye_limite_superior_y_nat():
+    df = _df(["2025-03-31 23:59:59", "2025-04-01", "", "2025-01-01", "2024-12-31"])
+    desde, hasta = rango_periodo("Trimestre actual", pd.Timestamp("2025-02-10"))
+    assert sorted(filtrar_por_fechas(df, desde, hasta)["n"]) == [0, 3]
+
+def test_filtrar_por_fechas_rangos_abiertos():
+    df = _df(["2025-01-10", "2025-02-10", "", "2025-03-10"])
+    assert sorted(filtrar_por_fechas(df, desde=pd.Timestamp("2025-02-01"))["n"]) == [1, 3]
+    assert sorted(filtrar_por_fechas(df, hasta=pd.Timestamp("2025-02-10"))["n"]) == [0]
+    # Sin límites no se filtra (se conservan las filas sin fecha)
+    assert len(filtrar_por_fechas(df)) == 4
+
+def test_filtrar_por_fechas_sin_filas_en_el_rango():
+    df = _df(["2025-01-10", ""])
+    assert filtrar_por_fechas(df, pd.Timestamp("2026-01-01"), pd.Timestamp("2027-01-01")).empty
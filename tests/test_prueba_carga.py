@@ -0,0 +1,29 @@
+import multiprocessing
+
+from prueba_carga import ClienteRemoto, GestorBackend, _percentil
+
+def _escribir_desde_otro_proceso(backend, n):
+    hoja = ClienteRemoto(backend).open_by_key("hoja").add_worksheet("estado")
+    hoja.append_row(["fila", str(n)])
+
+def test_el_backend_remoto_se_comparte_entre_procesos():
+    with GestorBackend() as gestor:
+        backend = gestor.BackendFalso()
+        procesos = [
+            multiprocessing.Process(target=_escribir_desde_otro_proceso, args=(backend, n))
+            for n in range(3)
+        ]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join(timeout=30)
+            assert proceso.exitcode == 0
+
+        hoja = ClienteRemoto(backend).open_by_key("hoja").add_worksheet("estado")
+        assert sorted(fila[1] for fila in hoja.get("A1:B")) == ["0", "1", "2"]
+        assert hoja.row_count == 3
+        assert backend.llamadas()["append_row"] == 3
+
+def test_percentil():
+    assert _percentil([], 95) == 0.0
+    assert _percentil([1.0, 2.0, 3.0], 50) == 2.0
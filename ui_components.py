@@ -1,5 +1,8 @@
 import streamlit as st
 from datetime import datetime
+from functools import lru_cache
+from html import escape
+from string import Template
 
 def render_header():
     """Renderiza el header principal de la aplicación"""
@@ -64,50 +67,75 @@ def render_metric_card(title, value, icon="📊"):
     </div>
     """, unsafe_allow_html=True)
 
+# Plantilla precompilada de tarjeta de objetivo; los estilos están en las
+# clases CSS .obj-card-* definidas en la hoja de estilos de la aplicación
+CAMPOS_TARJETA = ['objetivo', 'indicador', 'responsable', 'area', 'agrupacion', 'estado', 'timestamp']
+
+PLANTILLA_TARJETA = Template("""<div class='obj-card $clase_estado'>
+<div class='obj-card-header'><h4 class='obj-card-title'>$titulo</h4><span class='obj-card-estado'>$icono $estado</span></div>
+<div class='obj-card-grid'>
+<div><strong>📊 Indicador:</strong><br><span class='obj-card-muted'>$indicador</span></div>
+<div><strong>👤 Responsable:</strong><br><span class='obj-card-muted'>$responsable</span></div>
+</div>
+<div class='obj-card-grid obj-card-small'>
+<div><strong>🏢 Área:</strong> $area</div>
+<div><strong>📋 Agrupación:</strong> $agrupacion</div>
+</div>
+<div class='obj-card-meta'><strong>📅 Creado:</strong> $timestamp</div>
+</div>""")
+
+@lru_cache(maxsize=4096)
+def _html_tarjeta(objetivo, indicador, responsable, area, agrupacion, estado, timestamp):
+    """Genera el HTML de una tarjeta; se memoiza por versión (contenido) de la fila"""
+    activo = estado == 'ACTIVO'
+    titulo = objetivo[:100] + ('...' if len(objetivo) > 100 else '')
+    return PLANTILLA_TARJETA.substitute(
+        clase_estado='obj-card-activo' if activo else 'obj-card-inactivo',
+        titulo=escape(titulo),
+        icono="✅" if activo else "⏸️",
+        estado=escape(estado),
+        indicador=escape(indicador),
+        responsable=escape(responsable),
+        area=escape(area),
+        agrupacion=escape(agrupacion),
+        timestamp=escape(timestamp),
+    )
+
 def render_objective_summary_card(objetivo_data):
     """Renderiza una tarjeta resumen de objetivo"""
-    estado_color = "#28a745" if objetivo_data['estado'] == 'ACTIVO' else "#6c757d"
-    estado_icon = "✅" if objetivo_data['estado'] == 'ACTIVO' else "⏸️"
+    st.markdown(
+        _html_tarjeta(*(str(objetivo_data.get(campo, '')) for campo in CAMPOS_TARJETA)),
+        unsafe_allow_html=True
+    )
+
+def render_objective_cards(df, clave="tarjetas", tam_pagina=50):
+    """Renderiza una lista de tarjetas de objetivos por páginas.
     
-    st.markdown(f"""
-    <div style='
-        background: white;
-        padding: 1.5rem;
-        border-radius: 8px;
-        border-left: 4px solid {estado_color};
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        margin-bottom: 1rem;
-    '>
-        <div style='display: flex; justify-content: between; align-items: start; margin-bottom: 1rem;'>
-            <h4 style='margin: 0; color: #1f4e79;'>{objetivo_data['objetivo'][:100]}{'...' if len(objetivo_data['objetivo']) > 100 else ''}</h4>
-            <span style='color: {estado_color}; font-weight: bold;'>{estado_icon} {objetivo_data['estado']}</span>
-        </div>
-        
-        <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-bottom: 1rem;'>
-            <div>
-                <strong>📊 Indicador:</strong><br>
-                <span style='color: #6c757d;'>{objetivo_data['indicador']}</span>
-            </div>
-            <div>
-                <strong>👤 Responsable:</strong><br>
-                <span style='color: #6c757d;'>{objetivo_data['responsable']}</span>
-            </div>
-        </div>
-        
-        <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; font-size: 0.9rem; color: #6c757d;'>
-            <div>
-                <strong>🏢 Área:</strong> {objetivo_data['area']}
-            </div>
-            <div>
-                <strong>📋 Agrupación:</strong> {objetivo_data['agrupacion']}
-            </div>
-        </div>
-        
-        <div style='margin-top: 1rem; font-size: 0.8rem; color: #adb5bd;'>
-            <strong>📅 Creado:</strong> {objetivo_data['timestamp']}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    Cada página se envía en un único elemento markdown y se cargan más
+    tarjetas bajo petición. `clave` identifica la lista en la sesión; al
+    cambiar (p. ej. con otros filtros) se vuelve a la primera página.
+    """
+    if df.empty:
+        return
+    
+    clave_visibles = f"{clave}_visibles"
+    if clave_visibles not in st.session_state:
+        st.session_state[clave_visibles] = tam_pagina
+    visibles = min(st.session_state[clave_visibles], len(df))
+    
+    pagina = df.head(visibles)
+    columnas = [
+        pagina[campo].astype(str) if campo in pagina.columns else [''] * len(pagina)
+        for campo in CAMPOS_TARJETA
+    ]
+    html_tarjetas = "".join(_html_tarjeta(*fila) for fila in zip(*columnas))
+    st.markdown(f"<div class='obj-card-list'>{html_tarjetas}</div>", unsafe_allow_html=True)
+    
+    st.caption(f"Mostrando {visibles} de {len(df)} objetivos")
+    if visibles < len(df):
+        def cargar_mas():
+            st.session_state[clave_visibles] += tam_pagina
+        st.button("⬇️ Cargar más", key=f"{clave}_mas", on_click=cargar_mas, use_container_width=True)
 
 def render_filter_section():
     """Renderiza la sección de filtros con estilo"""
@@ -118,9 +146,9 @@ def render_filter_section():
     </div>
     """, unsafe_allow_html=True)
 
-def render_stats_dashboard(df):
-    """Renderiza un dashboard de estadísticas"""
-    if df.empty:
+def render_stats_dashboard(agregados):
+    """Renderiza un dashboard de estadísticas a partir de los agregados de objetivos"""
+    if agregados.total == 0:
         return
     
     st.markdown("### 📈 Estadísticas Generales")
@@ -128,23 +156,35 @@ def render_stats_dashboard(df):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_objetivos = len(df)
-        render_metric_card("Total Objetivos", total_objetivos, "🎯")
+        render_metric_card("Total Objetivos", agregados.total, "🎯")
     
     with col2:
-        areas_unicas = df['area'].nunique()
-        render_metric_card("Áreas Diferentes", areas_unicas, "🏢")
+        render_metric_card("Áreas Diferentes", agregados.n_areas, "🏢")
     
     with col3:
-        responsables_unicos = df['responsable'].nunique()
-        render_metric_card("Responsables", responsables_unicos, "👤")
+        render_metric_card("Responsables", agregados.n_responsables, "👤")
     
     with col4:
-        if 'estado' in df.columns:
-            objetivos_activos = len(df[df['estado'] == 'ACTIVO'])
-            render_metric_card("Objetivos Activos", objetivos_activos, "✅")
-        else:
-            render_metric_card("Agrupaciones", df['agrupacion'].nunique(), "📋")
+        render_metric_card("Objetivos Activos", agregados.contar_estado('ACTIVO'), "✅")
+
+def render_desglose_agregados(agregados):
+    """Renderiza los gráficos de desglose por área y por mes"""
+    if agregados.total == 0:
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 🏢 Objetivos por Área")
+        por_area_estado = agregados.por_area_y_estado()
+        if not por_area_estado.empty:
+            st.bar_chart(por_area_estado)
+    
+    with col2:
+        st.markdown("#### 📅 Objetivos por Mes")
+        por_mes = agregados.por_mes()
+        if not por_mes.empty:
+            st.bar_chart(por_mes.rename("Objetivos"))
 
 def render_loading_spinner(message="Cargando..."):
     """Renderiza un spinner de carga personalizado"""